@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Audit evidence per filled offer: full-page screenshot + field/value snapshot
+#
+# run_offer only queues a capture (no await), so the fill path never waits on
+# it. One background task per event loop takes the captures in order; the
+# zip is compressed and written in a worker thread, off the event loop.
+
+import asyncio
+import json
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from verify import snapshot
+
+AUDIT_DIR = Path(__file__).resolve().parent / "audit"
+MAX_PENDING = 16  # captures waiting beyond this are dropped (and counted), never awaited
+JPEG_QUALITY = 70  # the browser encodes the screenshot; ~10x smaller than PNG for form pages
+
+
+def _write(path: Path, shot: Optional[bytes], record: Dict) -> int:
+    """Runs in a worker thread: one .zip per offer, returns bytes written"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=6) as z:
+        z.writestr("fields.json", json.dumps(record, indent=2, default=str))
+        if shot:
+            z.writestr("screenshot.jpg", shot, compress_type=zipfile.ZIP_STORED)  # already compressed
+    tmp.replace(path)
+    return path.stat().st_size
+
+
+class AuditCapture:
+    """submit() is synchronous and O(1); the capture itself happens later in _run()"""
+
+    def __init__(self, max_pending: int = MAX_PENDING):
+        self.max_pending = max_pending
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.busy = False
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "failed": 0, "max_depth": 0,
+                      "bytes": 0, "capture_ms": 0.0, "write_ms": 0.0}
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize() + (1 if self.busy else 0) if self.queue else 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.queue = asyncio.Queue(self.max_pending)
+            self.busy = False
+            self.task = loop.create_task(self._run())
+
+    def submit(self, page, name: str, bindings: List[Dict], ids: Dict[str, str], meta: Optional[Dict] = None) -> int:
+        """Queue a capture of `page` as it is now; returns the queue depth (-1 = dropped)"""
+        self._ensure_worker()
+        job = {"page": page, "name": name, "bindings": list(bindings), "ids": dict(ids),
+               "meta": dict(meta or {}), "submitted": time.time()}
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return -1
+        self.stats["queued"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self.depth)
+        return self.depth
+
+    async def _run(self):
+        while True:
+            job = await self.queue.get()
+            self.busy = True
+            try:
+                await self._capture(job)
+            except Exception as e:  # closed tab, detached browser... the offer itself is unaffected
+                self.stats["failed"] += 1
+                print(f"⚠️ Audit capture failed for {job['name']}: {e}")
+            finally:
+                self.busy = False
+                self.queue.task_done()
+
+    async def _capture(self, job: Dict):
+        page = job["page"]
+        t0 = time.perf_counter()
+        fields = await snapshot(page, job["bindings"], job["ids"])
+        shot = await page.screenshot(full_page=True, type="jpeg", quality=JPEG_QUALITY)
+        t1 = time.perf_counter()
+        record = {"name": job["name"], "url": page.url, "submitted": job["submitted"], "captured": time.time(),
+                  "fields": list(fields.values()), **job["meta"]}
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(job["submitted"]))
+        path = AUDIT_DIR / time.strftime("%Y-%m-%d") / f"{job['name']}-{stamp}.zip"
+        size = await asyncio.to_thread(_write, path, shot, record)
+        self.stats["capture_ms"] += (t1 - t0) * 1000
+        self.stats["write_ms"] += (time.perf_counter() - t1) * 1000
+        self.stats["bytes"] += size
+        self.stats["written"] += 1
+
+    async def flush(self, timeout: float = 30.0) -> bool:
+        """Wait for pending captures (end of a script/batch, before the browser goes away)"""
+        if not self.queue:
+            return True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def print_stats(self):
+        s = self.stats
+        if not s["queued"] and not s["dropped"]:
+            return
+        done = s["written"] or 1
+        print(f"Audit: {s['written']}/{s['queued']} offers captured ({s['bytes'] / 1024:.0f} KB) in {AUDIT_DIR}, "
+              f"avg {s['capture_ms'] / done:.0f} ms capture + {s['write_ms'] / done:.0f} ms write off-loop, "
+              f"max queue depth {s['max_depth']}"
+              + (f", {s['dropped']} dropped (queue full)" if s["dropped"] else "")
+              + (f", {s['failed']} failed" if s["failed"] else ""))
+
+
+# Shared by every copy of the scripts in this process (batch/daemon load them
+# fresh per offer), so all offers go through one queue and one worker
+AUDIT = AuditCapture()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# Batch mode: fill many offers concurrently over a bounded pool of tabs / contexts
+#
+# Manifest (CSV with header, or JSON list) - one offer per row:
+#   excel,url
+#   data/offer_alice.xlsx,https://ats.example.com/prospects/123/offer
+#
+# Each url must open the offer form with the template already selected.
+# Start Chrome with background throttling off so hidden tabs keep working:
+#   google-chrome-stable --remote-debugging-port=9222 --user-data-dir=/tmp/sr-prospect \
+#     --disable-background-timer-throttling --disable-renderer-backgrounding \
+#     --disable-backgrounding-occluded-windows
+
+import argparse
+import asyncio
+import csv
+import json
+import time
+from typing import Dict, List
+
+from playwright.async_api import async_playwright
+
+from audit_capture import AUDIT
+from preflight import print_report, validate_offers
+from script_loader import load_script, set_region
+
+CDP_URLS = ["http://127.0.0.1:9222"]
+
+
+def read_manifest(path: str) -> List[Dict]:
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    offers = []
+    for i, r in enumerate(rows, 1):
+        if not r.get("excel") or not r.get("url"):
+            print(f"Manifest row {i}: missing excel/url, skipped")
+            continue
+        offers.append({"n": i, "excel": r["excel"], "url": r["url"], "name": r.get("name") or r["excel"]})
+    return offers
+
+
+async def open_slot(browser, mode: str):
+    """Context a slot opens its offer tabs in. New contexts get a copy of the login session."""
+    base = browser.contexts[0]
+    if mode == "contexts":
+        return await browser.new_context(storage_state=await base.storage_state())
+    return base
+
+
+async def run_one(ctx, offer: Dict, script: str, region: str) -> Dict:
+    # Fresh module per offer: own _ID_CACHE and readiness records, nothing shared.
+    # Own tab per offer too, so keyboard focus never crosses offers and the
+    # filled form is still there for the manual review step afterwards.
+    mod = load_script(script)
+    set_region(mod, region)
+    mod.READY.polling = 50
+    started = time.perf_counter()
+    try:
+        page = await ctx.new_page()
+        await page.goto(offer["url"], wait_until="domcontentloaded")
+        await mod.READY.form_settled(page, quiet_ms=200)
+        result = await mod.run_offer(page, offer["excel"])
+        mod.TRACE.write()
+        ok = result.get("verify", {}).get("ok", bool(result.get("filled")))
+    except Exception as e:
+        result, ok = {"error": str(e)}, False
+    return dict(result, name=offer["name"], ok=ok, seconds=time.perf_counter() - started)
+
+
+async def worker(slot_id: int, ctx, queue: asyncio.Queue, results: List[Dict], script: str, region: str):
+    while True:
+        offer = await queue.get()
+        try:
+            r = await run_one(ctx, offer, script, region)
+            r["slot"] = slot_id
+            results.append(r)
+            mem = r.get("memory") or {}
+            heap = f", heap {mem['js_heap_mb']:.0f} MB" if mem.get("js_heap_mb") is not None else ""
+            print(f"[slot {slot_id}] {offer['name']}: {'✅' if r['ok'] else '✗'} ({r['seconds']:.1f}s{heap})")
+        finally:
+            queue.task_done()
+
+
+def print_throughput(results: List[Dict], elapsed: float):
+    ok = sum(1 for r in results if r["ok"])
+    print(f"\nBatch finished: {ok}/{len(results)} offers OK in {elapsed:.1f}s")
+    if results:
+        per = sorted(r["seconds"] for r in results)
+        print(f"- Throughput: {len(results) / elapsed * 60:.1f} offers/min")
+        print(f"- Per offer: min {per[0]:.1f}s, median {per[len(per) // 2]:.1f}s, max {per[-1]:.1f}s")
+    for r in results:
+        if not r["ok"]:
+            print(f"- ✗ {r['name']}: {r.get('error', 'nothing filled')}")
+
+
+async def main():
+    ap = argparse.ArgumentParser(description="Fill many offers concurrently")
+    ap.add_argument("manifest", help="CSV/JSON with excel,url per offer")
+    ap.add_argument("--cdp", action="append", help="CDP endpoint (repeat for several Chrome instances)")
+    ap.add_argument("--pool", type=int, default=3, help="concurrent slots per Chrome instance")
+    ap.add_argument("--mode", choices=["pages", "contexts"], default="pages")
+    ap.add_argument("--script", default="mr-offer.py")
+    ap.add_argument("--region", default="IND", help="regions.json entry the workbooks follow")
+    ap.add_argument("--no-preflight", action="store_true", help="skip workbook validation")
+    args = ap.parse_args()
+
+    offers = read_manifest(args.manifest)
+    if offers and not args.no_preflight:
+        # Bad spreadsheets are rejected here, before they take a browser slot
+        checked = validate_offers([o["excel"] for o in offers], region=args.region)
+        print_report(checked)
+        offers = [o for o, c in zip(offers, checked) if c["ok"]]
+    if not offers:
+        print("Nothing to do")
+        return
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for o in offers:
+        queue.put_nowait(o)
+
+    results: List[Dict] = []
+    async with async_playwright() as p:
+        browsers = [await p.chromium.connect_over_cdp(u) for u in (args.cdp or CDP_URLS)]
+        slots = []
+        for b in browsers:
+            for _ in range(min(args.pool, len(offers))):
+                slots.append(await open_slot(b, args.mode))
+        print(f"Running {len(offers)} offers on {len(slots)} slots across {len(browsers)} browser(s)")
+
+        started = time.perf_counter()
+        workers = [
+            asyncio.create_task(worker(i, ctx, queue, results, args.script, args.region))
+            for i, ctx in enumerate(slots, 1)
+        ]
+        await queue.join()
+        elapsed = time.perf_counter() - started
+        for w in workers:
+            w.cancel()
+        # Screenshots still queued are taken now; not counted in the throughput
+        await AUDIT.flush(timeout=120)
+        # Offer tabs are left open for the manual review step
+
+    print_throughput(results, elapsed)
+    AUDIT.print_stats()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+# Offline benchmark: drive the offer scripts against bench/mock_ats.html in headless Chromium
+#
+#   python bench/bench-offers.py --runs 3 --latency 40 --jitter 30
+#   python bench/bench-offers.py --scripts mr-offer.py --churn --json bench_output.json
+#
+# Each script runs unmodified through its own main(): a headless Chromium is
+# started with a remote-debugging port, exactly like the real setup, and the
+# script's CDP_URL / EXCEL_FILE_PATH are pointed at it.
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+from playwright.async_api import async_playwright
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import tracing  # noqa: E402
+import verify  # noqa: E402
+import workbook_reader  # noqa: E402
+from fill_plans import REGIONS  # noqa: E402
+from script_loader import load_script  # noqa: E402
+
+MOCK_PAGE = Path(__file__).resolve().parent / "mock_ats.html"
+SCRIPTS = ["mr-offer.py", "offer-entry.py", "currency-changer.py"]
+
+# What each script is responsible for, for the success rate
+CHECKS = {
+    "mr-offer.py": ("currency", "amount"),
+    "offer-entry.py": ("amount",),
+    "currency-changer.py": ("currency",),
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def make_workbook(path: Path, cells: List[str], region: str = "IND") -> Dict[str, str]:
+    """Offer workbook that passes pre-flight (annual = 12 x monthly, totals add up) with
+    a distinct amount per bound cell; returns the expected digits"""
+    import openpyxl
+
+    checks = REGIONS[region].get("checks", {})
+    mcol, acol = checks.get("monthly_col", "D"), checks.get("annual_col", "E")
+    months, totals = checks.get("months", 12), checks.get("totals", {})
+    values: Dict[str, int] = {}
+    for k, addr in enumerate(sorted(set(cells)), 1):
+        if addr in totals or addr in values:
+            continue
+        row = addr[1:]
+        if addr[0] in (mcol, acol):
+            values[mcol + row] = 5000 + k * 123
+            values[acol + row] = months * values[mcol + row]
+        else:
+            values[addr] = 100000 + k * 1234
+    for total, parts in totals.items():  # listed in dependency order
+        values[total] = sum(values.get(p, 0) for p in parts)
+
+    wb = openpyxl.Workbook()
+    sh = wb.active
+    expected = {}
+    for addr in sorted(set(cells)):
+        sh[addr] = values[addr]
+        expected[addr] = str(values[addr])
+    wb.save(path)
+    return expected
+
+
+def start_chrome(exe: str, port: int, url: str, profile: str) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [exe, "--headless=new", f"--remote-debugging-port={port}", f"--user-data-dir={profile}",
+         "--no-first-run", "--no-default-browser-check", "--window-size=1280,1600", url],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version", timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("Chromium did not open its debugging port")
+
+
+async def check_snapshot(page, bindings: List[Dict]):
+    """Regression check: the read-back must see the USD every mock block starts with"""
+    await page.wait_for_function("window.__mock && window.__mock.state.length")
+    snap = await verify.snapshot(page, bindings, {})
+    wrong = {label: r.get("currency") for label, r in snap.items() if r["found"] and r["currency"] != "USD"}
+    if wrong or not snap:
+        raise RuntimeError(f"verify.snapshot misreads the mock's currencies: {wrong}")
+
+
+def percentile(xs: List[float], p: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+
+
+async def run_once(script: str, cdp_url: str, page, url: str, excel: Path, expected: Dict[str, str],
+                   tmp: Path, verbose: bool) -> Dict:
+    await page.goto(url)
+    await page.wait_for_function("window.__mock && window.__mock.state.length")
+
+    mod = load_script(script)
+    mod.CDP_URL = cdp_url
+    if hasattr(mod, "EXCEL_FILE_PATH"):
+        mod.EXCEL_FILE_PATH = str(excel)
+    if hasattr(mod, "SELECTORS"):
+        mod.SELECTORS.path = tmp / "selector_cache.json"
+    if hasattr(mod, "PLANS"):
+        mod.PLANS.path = tmp / "fill_plans.json"
+    if hasattr(mod, "HISTORY"):
+        mod.HISTORY = False  # mock-page runs must not join the real runs.sqlite baseline
+    if hasattr(mod, "AUDIT_CAPTURE"):
+        mod.AUDIT_CAPTURE = False  # no mock screenshots in audit/, no capture flush in the timing
+    if hasattr(mod, "RESUME"):
+        mod.RESUME = False  # every run reloads the same page + workbook: time the fill, not a resume
+
+    out = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if verbose else out):
+        error = None
+        try:
+            await mod.main()
+        except Exception as e:
+            error = str(e)
+    wall = time.perf_counter() - started
+
+    mock = await page.evaluate("({ state: window.__mock.state, log: window.__mock.log })")
+    labels = {b["label_text"]: b["excel_cell"] for b in getattr(mod, "BINDINGS", [])}
+    checks = CHECKS.get(script, ("currency", "amount"))
+    ok = total = 0
+    for f in mock["state"]:
+        if "currency" in checks:
+            total += 1
+            ok += f["currency"] == "INR"
+        if "amount" in checks and f["label"] in labels:
+            total += 1
+            ok += f["amount"] == expected.get(labels[f["label"]])
+
+    times = [e["t"] for e in sorted(mock["log"], key=lambda e: e["t"])]
+    per_field = [b - a for a, b in zip(times, times[1:])]
+    return {"wall_s": wall, "per_field_ms": per_field, "ok": ok, "total": total, "error": error}
+
+
+async def bench_script(script: str, exe: str, args, tmp: Path) -> Dict:
+    excel = tmp / "offer.xlsx"
+    cells = [b["excel_cell"] for b in load_script("mr-offer.py").BINDINGS]
+    expected = make_workbook(excel, cells)
+    url = MOCK_PAGE.as_uri() + f"?latency={args.latency}&jitter={args.jitter}&extra={args.extra}" + (
+        "&churn=1" if args.churn else "")
+
+    port = free_port()
+    profile = tempfile.mkdtemp(prefix="mock-ats-", dir=tmp)
+    chrome = start_chrome(exe, port, url, profile)
+    runs = []
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.connect_over_cdp(f"http://127.0.0.1:{port}")
+            page = browser.contexts[0].pages[-1]
+            await check_snapshot(page, load_script("mr-offer.py").BINDINGS)
+            for _ in range(args.runs):
+                runs.append(await run_once(script, f"http://127.0.0.1:{port}", page, url, excel,
+                                           expected, tmp, args.verbose))
+    finally:
+        chrome.kill()
+        chrome.wait()
+
+    per_field = [ms for r in runs for ms in r["per_field_ms"]]
+    walls = [r["wall_s"] for r in runs]
+    ok, total = sum(r["ok"] for r in runs), sum(r["total"] for r in runs)
+    return {
+        "script": script,
+        "runs": len(runs),
+        "wall_s_mean": statistics.mean(walls),
+        "wall_s_min": min(walls),
+        "field_ms_p50": percentile(per_field, 50),
+        "field_ms_p95": percentile(per_field, 95),
+        "success_rate": ok / total if total else 0.0,
+        "errors": [r["error"] for r in runs if r["error"]],
+    }
+
+
+def print_table(rows: List[Dict]):
+    print(f"\n{'script':22s} {'runs':>4s} {'wall mean':>10s} {'wall min':>9s} "
+          f"{'field p50':>10s} {'field p95':>10s} {'success':>8s}")
+    for r in rows:
+        print(f"{r['script']:22s} {r['runs']:4d} {r['wall_s_mean']:9.2f}s {r['wall_s_min']:8.2f}s "
+              f"{r['field_ms_p50']:8.0f}ms {r['field_ms_p95']:8.0f}ms {r['success_rate']:7.0%}")
+        for e in r["errors"]:
+            print(f"  ✗ {e}")
+
+
+async def main():
+    ap = argparse.ArgumentParser(description="Benchmark the offer scripts against the mock ATS")
+    ap.add_argument("--scripts", nargs="+", default=SCRIPTS)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--latency", type=int, default=30, help="mock render latency (ms)")
+    ap.add_argument("--jitter", type=int, default=20, help="mock re-render jitter (ms)")
+    ap.add_argument("--extra", type=int, default=10, help="non-currency blocks on the page")
+    ap.add_argument("--churn", action="store_true", help="re-rendered blocks get new ids")
+    ap.add_argument("--json", help="also write results to this file")
+    ap.add_argument("--verbose", action="store_true", help="show the scripts' own output")
+    args = ap.parse_args()
+
+    async with async_playwright() as p:
+        exe = p.chromium.executable_path
+
+    tmp = Path(tempfile.mkdtemp(prefix="offer-bench-"))
+    # Keep the real caches, traces/ and reports/ clean
+    workbook_reader.CACHE_PATH = tmp / "workbook_cache.json"
+    tracing.TRACE_DIR = tmp / "traces"
+    verify.REPORT_DIR = tmp / "reports"
+    try:
+        rows = [await bench_script(s, exe, args, tmp) for s in args.scripts]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
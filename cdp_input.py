@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# Keyboard input over one raw CDP session, one pipelined batch per step
+#
+# page.keyboard.press("Control+a") / .type("INR") await every key event in
+# turn (keyDown, keyUp, next key...). Here all Input.dispatchKeyEvent messages
+# of a step are written at once and awaited together: the browser still gets
+# the same events in the same order, minus the per-event round trips.
+
+import asyncio
+import re
+from typing import Dict, List, Sequence, Tuple
+
+MODIFIERS = {"Alt": 1, "Control": 2, "Meta": 4, "Shift": 8}
+# key -> (code, windowsVirtualKeyCode, text, location); same values Playwright's US layout sends
+_NAMED = {
+    "Alt": ("AltLeft", 18, "", 1),
+    "Control": ("ControlLeft", 17, "", 1),
+    "Meta": ("MetaLeft", 91, "", 1),
+    "Shift": ("ShiftLeft", 16, "", 1),
+    "Enter": ("Enter", 13, "\r", 0),
+    "Escape": ("Escape", 27, "", 0),
+    "Tab": ("Tab", 9, "", 0),
+    "Backspace": ("Backspace", 8, "", 0),
+    "ArrowDown": ("ArrowDown", 40, "", 0),
+    "ArrowUp": ("ArrowUp", 38, "", 0),
+}
+_PUNCT = {".": ("Period", 190), ",": ("Comma", 188), "-": ("Minus", 189), " ": ("Space", 32)}
+_NUMBER = re.compile(r"-?[0-9][0-9,]*(\.[0-9]+)?")
+
+Step = Tuple[str, str]  # ("press", "Control+a") | ("type", "INR") | ("insert", "125000")
+
+
+def _describe(key: str) -> Dict:
+    if key in _NAMED:
+        code, vk, text, loc = _NAMED[key]
+    elif len(key) == 1 and key.isascii() and key.isdigit():
+        code, vk, text, loc = f"Digit{key}", 48 + int(key), key, 0
+    elif len(key) == 1 and key.isascii() and key.isalpha():
+        code, vk, text, loc = f"Key{key.upper()}", ord(key.upper()), key, 0
+    elif key in _PUNCT:
+        code, vk = _PUNCT[key]
+        text, loc = key, 0
+    else:
+        raise KeyError(key)
+    return {"key": key, "code": code, "windowsVirtualKeyCode": vk, "text": text, "location": loc}
+
+
+def _key(kind: str, d: Dict, modifiers: int) -> Tuple[str, Dict]:
+    params = {"type": kind, "modifiers": modifiers, "key": d["key"], "code": d["code"],
+              "windowsVirtualKeyCode": d["windowsVirtualKeyCode"], "location": d["location"],
+              "autoRepeat": False, "isKeypad": False}
+    if kind != "keyUp" and d["text"] and not modifiers & ~MODIFIERS["Shift"]:
+        params["text"] = params["unmodifiedText"] = d["text"]  # Ctrl+A must not insert an "a"
+    return "Input.dispatchKeyEvent", params
+
+
+def press_messages(combo: str) -> List[Tuple[str, Dict]]:
+    """keyDown for each modifier, down/up of the key, modifiers released in reverse"""
+    *mods, key = combo.split("+")
+    msgs, bits = [], 0
+    for m in mods:
+        bits |= MODIFIERS[m]
+        msgs.append(_key("rawKeyDown", _describe(m), bits))
+    d = _describe(key)
+    msgs.append(_key("keyDown" if d["text"] else "rawKeyDown", d, bits))
+    msgs.append(_key("keyUp", d, bits))
+    for m in reversed(mods):
+        bits &= ~MODIFIERS[m]
+        msgs.append(_key("keyUp", _describe(m), bits))
+    return msgs
+
+
+def step_messages(steps: Sequence[Step]) -> List[Tuple[str, Dict]]:
+    msgs = []
+    for kind, arg in steps:
+        if kind == "press":
+            msgs += press_messages(arg)
+        elif kind == "type":
+            for ch in arg:
+                try:
+                    msgs += press_messages(ch)
+                except KeyError:  # not on the layout: Playwright inserts these as text too
+                    msgs.append(("Input.insertText", {"text": ch}))
+        else:
+            msgs.append(("Input.insertText", {"text": arg}))
+    return msgs
+
+
+def _legacy_cost(steps: Sequence[Step]) -> int:
+    """Sequential driver -> browser dispatches the per-call keyboard path needs for `steps`"""
+    n = 0
+    for kind, arg in steps:
+        if kind == "press":
+            n += 2 * len(arg.split("+"))
+        elif kind == "type":
+            n += 2 * len(arg)
+        else:
+            n += 1
+    return n
+
+
+def is_number(value: str) -> bool:
+    return bool(_NUMBER.fullmatch(value or ""))
+
+
+class CDPKeyboard:
+    """One CDP session per page; send() = one awaited, pipelined batch per step"""
+
+    def __init__(self):
+        self.page = None
+        self.session = None
+        self.unavailable = False  # not Chromium / CDP refused: stay on page.keyboard
+        self.reset()
+
+    def reset(self):
+        self.stats = {"batches": 0, "messages": 0, "calls_before": 0, "round_trips_before": 0}
+
+    async def _session(self, page):
+        if self.page is not page or self.session is None:
+            if self.session is not None:
+                try:
+                    await self.session.detach()
+                except Exception:
+                    pass
+            self.session, self.page = await page.context.new_cdp_session(page), page
+        return self.session
+
+    async def send(self, page, *steps: Step, batched: bool = True):
+        """Run `steps` in order; batched=False is the old per-call page.keyboard path"""
+        self.stats["calls_before"] += len(steps)
+        self.stats["round_trips_before"] += _legacy_cost(steps)
+        if batched and not self.unavailable:
+            try:
+                session = await self._session(page)
+            except Exception:
+                self.unavailable = True
+        if not batched or self.unavailable:
+            await self._each(page, steps)
+            return
+        msgs = step_messages(steps)
+        try:
+            # All sends are started before any is awaited; the session keeps them in order
+            await asyncio.gather(*(session.send(m, p) for m, p in msgs))
+        except Exception:
+            self.session = None  # a fresh session next time; the caller's retry re-selects and retypes
+            raise
+        self.stats["batches"] += 1
+        self.stats["messages"] += len(msgs)
+
+    async def _each(self, page, steps: Sequence[Step]):
+        for kind, arg in steps:
+            if kind == "press":
+                await page.keyboard.press(arg)
+            elif kind == "type":
+                await page.keyboard.type(arg, delay=5)
+            else:
+                await page.keyboard.insert_text(arg)
+            self.stats["batches"] += 1
+            self.stats["messages"] += _legacy_cost([(kind, arg)])
+
+    def summary(self) -> str:
+        s = self.stats
+        if not s["calls_before"] and not s["batches"]:
+            return "no keyboard input"
+        return (f"{s['messages']} input events in {s['batches']} awaited batches "
+                f"(per-call keyboard: {s['calls_before']} calls, {s['round_trips_before']} sequential round trips)")
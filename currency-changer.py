@@ -1,28 +1,41 @@
 import asyncio
+import time
+from urllib.parse import urlsplit
 from playwright.async_api import async_playwright
 
+from currency_discovery import discover_currency_fields
+from fill_plans import region_source, region_target
+from readiness import Readiness
+from run_history import record_run
+from tracing import Tracer
+
 CDP_URL = "http://127.0.0.1:9222"
-TARGET = "INR"
+TARGET = region_target("IND")  # see regions.json
+SOURCE = region_source("IND")
+HISTORY = True  # record timings / success per run in runs.sqlite (python run_history.py report)
+
+READY = Readiness()
+TRACE = Tracer("currency-changer")  # per-field phase timings -> traces/*.jsonl
 
 async def change_currency_field(page, element):
     """Change one currency field using the fastest approach"""
     try:
-        # Click the element
+        # Click the element and wait for the dropdown to open
         await element.click()
-        
-        # Minimal wait for dropdown to open
-        await page.wait_for_timeout(100)
+        await READY.listbox_open(page)
         
         # Clear and type INR fast
         await page.keyboard.press("Control+a")
         await page.keyboard.type(TARGET, delay=15)
         
-        # Critical wait for filtering to show INR
-        await page.wait_for_timeout(180)
+        # Critical: wait until filtering shows INR
+        await READY.option_rendered(page, TARGET)
         
         # Select INR
         await page.keyboard.press("ArrowDown")
+        await READY.option_highlighted(page, TARGET)
         await page.keyboard.press("Enter")
+        await READY.committed(page, element, TARGET)
         
         return True
         
@@ -34,91 +47,53 @@ async def main():
     async with async_playwright() as p:
         browser = await p.chromium.connect_over_cdp(CDP_URL)
         page = browser.contexts[0].pages[-1]
+        TRACE.bind(page)
+        started = time.perf_counter()
         
         print("Discovering currency dropdowns...")
         
-        # Find all elements that have "USD" in their text and are clickable
-        # Look for elements with IDs starting with "spl-form-element_" that contain USD
-        all_elements = await page.query_selector_all('[id^="spl-form-element_"]')
-        
-        currency_fields = []
-        for element in all_elements:
-            try:
-                # Check if this element or its children contain "USD"
-                text_content = await element.text_content()
-                if text_content and "USD" in text_content:
-                    element_id = await element.get_attribute("id")
-                    print(f"Found currency field: {element_id}")
-                    currency_fields.append(element)
-            except:
-                continue
-        
-        if not currency_fields:
-            print("No currency fields found! Trying alternative approach...")
-            
-            # Alternative: Look for any clickable element containing "USD"
-            usd_elements = await page.query_selector_all('*:has-text("USD")')
-            for element in usd_elements:
-                try:
-                    # Check if it's clickable (has click handler or is a form element)
-                    tag_name = await element.evaluate("el => el.tagName.toLowerCase()")
-                    if tag_name in ['div', 'button', 'select', 'input']:
-                        # Test if it's actually clickable by checking if it responds to hover
-                        bbox = await element.bounding_box()
-                        if bbox and bbox['width'] > 20 and bbox['height'] > 20:  # Reasonable size
-                            currency_fields.append(element)
-                            print(f"Found clickable USD element: {tag_name}")
-                except:
-                    continue
-        
-        print(f"Found {len(currency_fields)} currency fields to change")
-        
-        # SIMPLE SOLUTION: Just take the first 17 fields (likely the main salary fields)
-        currency_fields = currency_fields[:17]
-        print(f"Limited to first {len(currency_fields)} fields")
-        
-        if not currency_fields:
+        # Single in-page pass: candidates, boxes and current currency in one evaluate,
+        # then first-17 cap and position dedup done on that snapshot
+        with TRACE.span("*", "discovery"):
+            found = await discover_currency_fields(page, SOURCE, limit=17)
+        for f in found["fields"]:
+            if f["via"] == "fallback":
+                print(f"Found clickable {SOURCE} element: {f['tag']}")
+            else:
+                print(f"Found currency field: {f['id']} ({f['currency']})")
+
+        print(f"Found {found['candidates']} candidates in {found['round_trips']} round trip(s)")
+
+        if not found["fields"]:
             print("No currency fields found at all!")
             return
-        
-        # Remove duplicates by position
-        unique_fields = []
-        for field in currency_fields:
-            try:
-                bbox = await field.bounding_box()
-                if bbox:
-                    is_duplicate = False
-                    for existing in unique_fields:
-                        existing_bbox = await existing.bounding_box()
-                        if existing_bbox:
-                            # Same position = duplicate
-                            if abs(bbox['x'] - existing_bbox['x']) < 10 and abs(bbox['y'] - existing_bbox['y']) < 10:
-                                is_duplicate = True
-                                break
-                    if not is_duplicate:
-                        unique_fields.append(field)
-                else:
-                    unique_fields.append(field)  # Include if we can't get bbox
-            except:
-                unique_fields.append(field)
-        
+
+        unique_fields = [(f["id"] or f["selector"], page.locator(f["selector"])) for f in found["fields"]]
         print(f"{len(unique_fields)} unique currency fields to change")
         
         # Change each field using your fast working method
         successful = 0
-        for i, field in enumerate(unique_fields, 1):
+        for i, (name, field) in enumerate(unique_fields, 1):
             print(f"Changing field {i}/{len(unique_fields)}...", end=" ")
             
-            if await change_currency_field(page, field):
+            with TRACE.span(name, "currency") as sp:
+                sp.ok = await change_currency_field(page, field)
+            if sp.ok:
                 successful += 1
                 print("Done")
             else:
                 print("Failed")
             
-            # Minimal delay between fields for speed
-            await page.wait_for_timeout(100)
+            # Let the form finish re-rendering before the next field
+            with TRACE.span(name, "settle"):
+                await READY.form_settled(page, quiet_ms=30)
         
         print(f"\nSuccessfully changed {successful}/{len(unique_fields)} fields to {TARGET}")
+        if HISTORY:
+            record_run(TRACE.spans, TRACE.name, host=urlsplit(page.url).netloc, region="IND",
+                       wall_ms=(time.perf_counter() - started) * 1000, filled=successful, total=len(unique_fields))
+        READY.print_summary()
+        TRACE.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Currency field discovery: one in-page pass instead of one CDP call per element
+
+from typing import Dict, List, Optional
+
+from tracing import round_trips
+
+BLOCK_SELECTOR = '[id^="spl-form-element_"]'
+MARKER_ATTR = "data-offer-cur"
+MAX_MARKED = 200  # the text fallback can match thousands of nodes; only this many get a marker
+
+# Runs entirely in the page: collects id, tag, box and current currency for
+# every candidate and tags each one with MARKER_ATTR so Python can target it
+# with a plain locator afterwards (no ElementHandles kept alive).
+_DISCOVER_JS = """
+({ blockSelector, needle, marker, tags, max }) => {
+  document.querySelectorAll('[' + marker + ']').forEach(e => e.removeAttribute(marker));
+
+  const currencyOf = (el) => {
+    const box = el.querySelector('[role="combobox"], button[aria-expanded], button') || el;
+    const text = (box.textContent || '') + ' ' + (box.value || '');
+    const m = text.match(/\\b[A-Z]{3}\\b/);
+    return m ? m[0] : null;
+  };
+  const boxOf = (el) => {
+    const r = el.getBoundingClientRect();
+    if (!r.width && !r.height) return null;
+    return { x: r.x, y: r.y, width: r.width, height: r.height };
+  };
+  const out = [];
+  let total = 0;
+  const push = (el, via) => {
+    total += 1;
+    if (out.length >= max) return;
+    el.setAttribute(marker, String(out.length));
+    out.push({
+      index: out.length,
+      id: el.id || null,
+      tag: el.tagName.toLowerCase(),
+      box: boxOf(el),
+      currency: currencyOf(el),
+      via,
+    });
+  };
+
+  for (const el of document.querySelectorAll(blockSelector)) {
+    if ((el.textContent || '').includes(needle)) push(el, 'block');
+  }
+  if (!out.length) {
+    // Same rules as the old *:has-text() fallback: visible-ish form-ish tags only
+    const lower = needle.toLowerCase();
+    for (const el of document.querySelectorAll(tags.join(','))) {
+      const text = ((el.textContent || '') + ' ' + (el.value || '')).toLowerCase();
+      if (!text.includes(lower)) continue;
+      const b = boxOf(el);
+      if (b && b.width > 20 && b.height > 20) push(el, 'fallback');
+    }
+  }
+  return { out, total };
+}
+"""
+
+
+def dedupe_by_position(fields: List[Dict], tolerance: float = 10) -> List[Dict]:
+    """Drop candidates sitting on top of an earlier one (same rule as before, no I/O)"""
+    unique: List[Dict] = []
+    for f in fields:
+        box = f.get("box")
+        if box and any(
+            u.get("box")
+            and abs(box["x"] - u["box"]["x"]) < tolerance
+            and abs(box["y"] - u["box"]["y"]) < tolerance
+            for u in unique
+        ):
+            continue
+        unique.append(f)
+    return unique
+
+
+def field_selector(field: Dict) -> str:
+    return f'[{MARKER_ATTR}="{field["index"]}"]'
+
+
+async def discover_currency_fields(page, needle: str = "USD", limit: Optional[int] = 17) -> Dict:
+    """Find currency fields in a single evaluate.
+
+    Returns {"fields": [...], "candidates": n, "round_trips": n}; each field has
+    id, tag, box, currency and a "selector" usable with page.locator().
+    "candidates" counts every match, even past the MAX_MARKED that get returned.
+    """
+    rt0 = round_trips(page)
+    found = await page.evaluate(
+        _DISCOVER_JS,
+        {
+            "blockSelector": BLOCK_SELECTOR,
+            "needle": needle,
+            "marker": MARKER_ATTR,
+            "tags": ["div", "button", "select", "input"],
+            "max": MAX_MARKED,
+        },
+    )
+    rt1 = round_trips(page)
+    candidates = found["out"]
+
+    fields = candidates[:limit] if limit else list(candidates)
+    fields = dedupe_by_position(fields)
+    for f in fields:
+        f["selector"] = field_selector(f)
+
+    # Off the connection counter like every trace span (1 if Playwright's internals moved)
+    trips = rt1 - rt0 if rt0 is not None and rt1 is not None else 1
+    return {"fields": fields, "candidates": found["total"], "round_trips": trips}
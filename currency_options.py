@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Direct option pick: learn where the target currency sits in the listbox once
+# per page, then click it straight away in every dropdown - no filter typing
+
+from typing import Dict, Optional
+
+MARK_ATTR = "data-offer-opt"
+
+# Marks the option to click in the open listbox. With a cached {id, index}
+# for the target it goes straight there (id, then index as long as that option
+# still names the target) and sends no option list back. Only the first
+# dropdown on a page - or a stale cache - reads every option, matching the
+# currency code (data-value / data-code / exact text) and returning the list.
+_PICK_JS = """
+({ target, cached, markAttr }) => {
+  const visible = (el) => { const r = el.getBoundingClientRect(); return r.width > 0 && r.height > 0; };
+  document.querySelectorAll('[' + markAttr + ']').forEach((el) => el.removeAttribute(markAttr));
+  const list = [...document.querySelectorAll('[role="listbox"]')].find(visible);
+  if (!list) return { how: null, options: null };
+  const code = (o) => (o.dataset.value || o.dataset.code || o.textContent || '').trim().toUpperCase();
+  let opts = null;
+  const all = () => opts || (opts = [...list.querySelectorAll('[role="option"], li')]);
+
+  let pick = null, how = null, options = null, index = null;
+  if (cached) {
+    const byId = cached.id && document.getElementById(cached.id);
+    if (byId && list.contains(byId) && code(byId).includes(target)) { pick = byId; how = 'id'; index = cached.index; }
+    if (!pick) {
+      const at = all()[cached.index];
+      if (at && code(at).includes(target)) { pick = at; how = 'index'; index = cached.index; }
+    }
+  }
+  if (!pick) {
+    options = all().map((o, i) => ({ index: i, id: o.id || null, code: code(o).slice(0, 40) }));
+    pick = all().find((o) => code(o) === target); how = 'code';
+    if (!pick) { pick = all().find((o) => new RegExp('\\\\b' + target + '\\\\b').test(code(o))); how = 'text'; }
+    if (pick) index = all().indexOf(pick);
+  }
+  if (!pick) return { how: null, options };
+  pick.setAttribute(markAttr, '1');
+  pick.scrollIntoView({ block: 'nearest' });
+  return { how, options, index, id: pick.id || null };
+}
+"""
+
+
+class OptionIndex:
+    """currency code -> {index, id} of its option, learned from the first dropdown on a page"""
+
+    def __init__(self):
+        self.url: Optional[str] = None
+        self.options: Dict[str, Dict] = {}
+        self.stats = {"direct": 0, "typed": 0, "reads": 0}
+
+    def _for_page(self, page):
+        if page.url != self.url:
+            self.url, self.options = page.url, {}
+
+    async def pick(self, page, target: str) -> Optional[str]:
+        """Mark the target option in the open listbox; returns how it was found, or None"""
+        self._for_page(page)
+        res = await page.evaluate(_PICK_JS, {"target": target.upper(), "cached": self.options.get(target),
+                                             "markAttr": MARK_ATTR})
+        if res["options"]:  # only on a first / stale read: the list came back, refresh the cache
+            self.stats["reads"] += 1
+            for o in res["options"]:
+                self.options[o["code"]] = {"index": o["index"], "id": o["id"]}
+        if res["how"]:
+            self.options[target] = {"index": res["index"], "id": res["id"]}
+        return res["how"]
+
+    def option(self, page):
+        """Locator for the option pick() marked"""
+        return page.locator(f'[{MARK_ATTR}="1"]').first
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# Region registry, template fingerprints and compiled fill plans
+
+import copy
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+HERE = Path(__file__).resolve().parent
+REGIONS_PATH = HERE / "regions.json"
+PLANS_PATH = HERE / ".fill_plans.json"
+MAX_PLANS = 50
+
+with open(REGIONS_PATH, encoding="utf-8") as _f:
+    REGIONS: Dict[str, Dict] = json.load(_f)
+
+# ISO 4217 codes. A block only counts as a currency field when its button shows
+# one of these - "Upload PDF" or a country picker showing "IND" / "USA" doesn't.
+CURRENCY_CODES = frozenset("""
+AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB BRL BSD BTN BWP BYN BZD
+CAD CDF CHF CLP CNY COP CRC CUP CVE CZK DJF DKK DOP DZD EGP ERN ETB EUR FJD FKP GBP GEL GHS GIP GMD
+GNF GTQ GYD HKD HNL HTG HUF IDR ILS INR IQD IRR ISK JMD JOD JPY KES KGS KHR KMF KPW KRW KWD KYD KZT
+LAK LBP LKR LRD LSL LYD MAD MDL MGA MKD MMK MNT MOP MRU MUR MVR MWK MXN MYR MZN NAD NGN NIO NOK NPR
+NZD OMR PAB PEN PGK PHP PKR PLN PYG QAR RON RSD RUB RWF SAR SBD SCR SDG SEK SGD SHP SLE SOS SRD SSP
+STN SYP SZL THB TJS TMT TND TOP TRY TTD TWD TZS UAH UGX USD UYU UZS VES VND VUV WST XAF XCD XOF XPF
+YER ZAR ZMW ZWL
+""".split())
+
+
+def region_bindings(region: str) -> List[Dict]:
+    """Fresh copy of a region's label -> Excel cell bindings"""
+    return copy.deepcopy(REGIONS[region]["bindings"])
+
+
+def region_target(region: str) -> str:
+    return REGIONS[region]["target"]
+
+
+def region_source(region: str) -> str:
+    """Currency the template starts in (what discovery looks for)"""
+    return REGIONS[region].get("source_currency", "USD")
+
+
+# Form structure in one call: every block's id, its label and current currency.
+_FINGERPRINT_JS = """
+() => [...document.querySelectorAll('[id^="spl-form-element_"]')].map((b) => {
+  const l = b.querySelector('label, legend, [class*="label" i]');
+  const text = ((l && l.textContent) || b.textContent || '').replace(/\\s+/g, ' ').trim();
+  const cur = b.querySelector('[role="combobox"], button[aria-expanded], button');
+  const m = ((cur && (cur.value || cur.textContent)) || '').match(/\\b[A-Z]{3}\\b/);
+  return { id: b.id, label: text.slice(0, 120), currency: m ? m[0] : null };
+})
+"""
+
+
+async def fingerprint(page) -> Dict:
+    """{"hash", "blocks"}: hash covers the set of (id, label) pairs on the form"""
+    blocks = await page.evaluate(_FINGERPRINT_JS)
+    for b in blocks:
+        if b["currency"] not in CURRENCY_CODES:
+            b["currency"] = None  # some other 3-letter word: not a currency control
+    h = hashlib.sha1("\n".join(sorted(f"{b['id']}|{b['label']}" for b in blocks)).encode()).hexdigest()
+    return {"hash": h[:20], "blocks": blocks}
+
+
+def match_region(fp: Dict) -> Optional[str]:
+    """Region whose binding labels best cover the page's labels"""
+    page_text = [b["label"].lower() for b in fp["blocks"]]
+    best, best_score = None, 0.0
+    for name, reg in REGIONS.items():
+        labels = [b["label_text"].lower() for b in reg["bindings"]]
+        hit = sum(1 for l in labels if any(l in t for t in page_text))
+        score = hit / len(labels) if labels else 0.0
+        if score > best_score:
+            best, best_score = name, score
+    return best if best_score >= 0.5 else None
+
+
+class FillPlans:
+    """Compiled plans keyed by template fingerprint, kept in .fill_plans.json"""
+
+    def __init__(self, path: Path = PLANS_PATH, max_plans: int = MAX_PLANS):
+        self.path = Path(path)
+        self.max_plans = max_plans
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, fp: Dict) -> Optional[Dict]:
+        return self._read().get(fp["hash"])
+
+    def compile(self, fp: Dict, region: str, bindings: List[Dict], ids: Dict[str, str],
+                input_strategy: str = "keyboard") -> Optional[Dict]:
+        """Freeze what discovery learned on this template into a plan for next time"""
+        on_page = {b["id"]: b for b in fp["blocks"]}
+        steps = []
+        for b in bindings:
+            bid = ids.get(b["label_text"]) or b.get("container_id")
+            if not bid or bid not in on_page:
+                return None  # incomplete discovery - don't freeze a half plan
+            steps.append({
+                "label_text": b["label_text"],
+                "excel_cell": b["excel_cell"],
+                "container_id": bid,
+                "currency": on_page[bid]["currency"] is not None,
+                "input": input_strategy,
+            })
+        bound = {s["container_id"] for s in steps}
+        plan = {
+            "fingerprint": fp["hash"],
+            "region": region,
+            "target": region_target(region),
+            "steps": steps,
+            # Currency blocks no binding covers still need switching
+            "extra_currency_ids": [b["id"] for b in fp["blocks"] if b["currency"] and b["id"] not in bound],
+            "compiled": time.time(),
+        }
+        data = self._read()
+        data.pop(fp["hash"], None)
+        data[fp["hash"]] = plan
+        while len(data) > self.max_plans:
+            data.pop(next(iter(data)))
+        try:
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Fill plan not saved: {e}")
+        return plan
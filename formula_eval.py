@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+# Small formula engine for the salary breakdown sheet: + - * / ^ %, unary minus,
+# parentheses, cell refs, ranges, SUM and ROUND. Enough to fill in the bound
+# cells (E21, D16, E13 ...) of workbooks no spreadsheet app ever recalculated.
+
+import hashlib
+import re
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+Sheet = Dict[str, object]  # "D6" -> value, or "=SUM(D6:D8)" for a formula cell
+
+_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<num>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+    | (?P<range>\$?[A-Z]{1,3}\$?\d+:\$?[A-Z]{1,3}\$?\d+)
+    | (?P<ref>\$?[A-Z]{1,3}\$?\d+)
+    | (?P<func>[A-Z][A-Z0-9.]*)\s*\(
+    | (?P<op>[-+*/^%(),])
+    )""", re.VERBOSE)
+_ADDR = re.compile(r"^([A-Z]+)(\d+)$")
+_MAX_GRAPHS = 32
+_ERROR = object()  # a cell Excel would show as #VALUE!, #DIV/0! ... - propagates like there
+
+
+class FormulaError(ValueError):
+    """Formula this engine doesn't cover, or one Excel would show as an error"""
+
+
+def _col_num(col: str) -> int:
+    n = 0
+    for ch in col:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+def _col_name(n: int) -> str:
+    s = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def cell_name(row: int, col: int) -> str:
+    """(6, 4) -> D6"""
+    return f"{_col_name(col)}{row}"
+
+
+def _expand(rng: str) -> List[str]:
+    a, b = rng.replace("$", "").split(":")
+    (ca, ra), (cb, rb) = _ADDR.match(a).groups(), _ADDR.match(b).groups()
+    c0, c1 = sorted((_col_num(ca), _col_num(cb)))
+    r0, r1 = sorted((int(ra), int(rb)))
+    return [f"{_col_name(c)}{r}" for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+
+
+def _tokens(text: str) -> List[Tuple[str, str]]:
+    out, pos, text = [], 0, text.upper()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            if text[pos:].strip():
+                raise FormulaError(f"can't read formula at {text[pos:]!r}")
+            break
+        kind = m.lastgroup
+        out.append((kind, m.group(kind)))
+        pos = m.end()
+    return out
+
+
+# ---------- parse to closures ----------
+def _num(v) -> float:
+    """Value as Excel arithmetic sees it: blank -> 0, numeric text -> number"""
+    if v is _ERROR:
+        raise FormulaError("error in a referenced cell")
+    if v is None or v == "":
+        return 0.0
+    if isinstance(v, bool):
+        return float(v)
+    if isinstance(v, (int, float)):
+        return float(v)
+    try:
+        return float(str(v).replace(",", ""))
+    except ValueError:
+        raise FormulaError(f"#VALUE! ({v!r})")
+
+
+def _round(x: float, digits: float = 0) -> float:
+    """Excel ROUND: half away from zero, negative digits allowed"""
+    q = Decimal(1).scaleb(-int(digits))
+    d = Decimal(repr(x)).quantize(q, rounding=ROUND_HALF_UP) if int(digits) >= 0 else \
+        (Decimal(repr(x)) / q).quantize(Decimal(1), rounding=ROUND_HALF_UP) * q
+    return float(d)
+
+
+def _sum(*args) -> float:
+    total = 0.0
+    for a in args:
+        for v in (a if isinstance(a, list) else [a]):
+            # SUM skips text and blanks inside ranges, like Excel
+            if v is _ERROR:
+                raise FormulaError("error in a referenced cell")
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                total += v
+    return total
+
+
+def _literal(v):
+    if isinstance(v, str):
+        try:
+            return float(v.strip().replace(",", "")) if v.strip() else None
+        except ValueError:
+            return v
+    return v
+
+
+_FUNCS: Dict[str, Callable] = {
+    "SUM": _sum,
+    "ROUND": lambda x, n=0: _round(_num(x), _num(n)),
+}
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.toks = _tokens(text)
+        self.i = 0
+        self.refs: List[str] = []
+
+    def peek(self) -> Optional[Tuple[str, str]]:
+        return self.toks[self.i] if self.i < len(self.toks) else None
+
+    def take(self, value: Optional[str] = None) -> Tuple[str, str]:
+        tok = self.peek()
+        if tok is None or (value is not None and tok[1] != value):
+            raise FormulaError(f"expected {value or 'more'} in formula")
+        self.i += 1
+        return tok
+
+    def parse(self):
+        fn = self.expr()
+        if self.peek() is not None:
+            raise FormulaError(f"unexpected {self.peek()[1]!r} in formula")
+        return fn
+
+    def expr(self):
+        fn = self.term()
+        while self.peek() and self.peek()[1] in "+-":
+            op, lhs, rhs = self.take()[1], fn, self.term()
+            fn = (lambda l, r: lambda env: _num(l(env)) + _num(r(env)))(lhs, rhs) if op == "+" else \
+                 (lambda l, r: lambda env: _num(l(env)) - _num(r(env)))(lhs, rhs)
+        return fn
+
+    def term(self):
+        fn = self.power()
+        while self.peek() and self.peek()[1] in "*/":
+            op, lhs, rhs = self.take()[1], fn, self.power()
+            fn = (lambda l, r: lambda env: _num(l(env)) * _num(r(env)))(lhs, rhs) if op == "*" else \
+                 (lambda l, r: lambda env: _div(_num(l(env)), _num(r(env))))(lhs, rhs)
+        return fn
+
+    def power(self):
+        fn = self.unary()
+        while self.peek() and self.peek()[1] == "^":
+            self.take()
+            fn = (lambda l, r: lambda env: _num(l(env)) ** _num(r(env)))(fn, self.unary())
+        return fn
+
+    def unary(self):
+        # Excel binds unary minus tighter than ^ : -2^2 = 4
+        tok = self.peek()
+        if tok and tok[1] in "+-":
+            self.take()
+            inner = self.unary()
+            return (lambda env: -_num(inner(env))) if tok[1] == "-" else (lambda env: _num(inner(env)))
+        fn = self.primary()
+        while self.peek() and self.peek()[1] == "%":
+            self.take()
+            fn = (lambda f: lambda env: _num(f(env)) / 100)(fn)
+        return fn
+
+    def primary(self):
+        kind, val = self.take()
+        if kind == "num":
+            x = float(val)
+            return lambda env: x
+        if kind == "ref":
+            addr = val.replace("$", "")
+            self.refs.append(addr)
+            return lambda env: env.get(addr)
+        if kind == "range":
+            cells = _expand(val)
+            self.refs.extend(cells)
+            return lambda env: [env.get(a) for a in cells]
+        if kind == "func":
+            if val not in _FUNCS:
+                raise FormulaError(f"function {val} not supported")
+            args = []
+            if self.peek() and self.peek()[1] != ")":
+                args.append(self.expr())
+                while self.peek() and self.peek()[1] == ",":
+                    self.take()
+                    args.append(self.expr())
+            self.take(")")
+            f = _FUNCS[val]
+            return lambda env: f(*(a(env) for a in args))
+        if val == "(":
+            fn = self.expr()
+            self.take(")")
+            return fn
+        raise FormulaError(f"unexpected {val!r} in formula")
+
+
+def _div(a: float, b: float) -> float:
+    if b == 0:
+        raise FormulaError("#DIV/0!")
+    return a / b
+
+
+_COMPILED: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+
+
+def compile_formula(text: str) -> Tuple[Callable, Tuple[str, ...]]:
+    """"=ROUND(D6*12,0)" -> (fn(env) -> value, referenced cells); cached by formula text"""
+    hit = _COMPILED.get(text)
+    if hit is None:
+        p = _Parser(text.lstrip("="))
+        hit = _COMPILED[text] = (p.parse(), tuple(dict.fromkeys(p.refs)))
+    return hit
+
+
+def is_formula(v) -> bool:
+    return isinstance(v, str) and v.startswith("=") and len(v) > 1
+
+
+# ---------- dependency graph ----------
+class FormulaGraph:
+    """Formula cells the targets depend on, in evaluation order"""
+
+    def __init__(self, formulas: Dict[str, str], targets: Iterable[str]):
+        self.order: List[Tuple[str, Callable]] = []
+        self.broken: Dict[str, str] = {}  # cell -> why it can't be computed
+        state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(cell: str):
+            if state.get(cell) == 2 or cell not in formulas:
+                return
+            if state.get(cell) == 1:
+                self.broken[cell] = "circular reference"
+                return
+            state[cell] = 1
+            try:
+                fn, refs = compile_formula(formulas[cell])
+            except FormulaError as e:
+                self.broken[cell] = str(e)
+                state[cell] = 2
+                return
+            for r in refs:
+                visit(r)
+            state[cell] = 2
+            self.order.append((cell, fn))
+
+        for t in targets:
+            visit(t)
+
+    def evaluate(self, sheet: Sheet) -> Dict[str, object]:
+        """Computed value for every formula cell in the graph (None where Excel shows an error)"""
+        # CSV / JSON exports carry every number as text - treat those as numbers
+        env = {k: _literal(v) for k, v in sheet.items() if not is_formula(v)}
+        for cell in self.broken:
+            env[cell] = _ERROR
+        for cell, fn in self.order:
+            try:
+                v = fn(env)
+                v = _sum(v) if isinstance(v, list) else v
+                env[cell] = int(v) if isinstance(v, float) and v.is_integer() else v
+            except (FormulaError, OverflowError, TypeError, ValueError, ZeroDivisionError):
+                env[cell] = _ERROR
+        out = {cell: env.get(cell) for cell, _ in self.order}
+        out.update({cell: None for cell in self.broken})
+        return {c: None if v is _ERROR else v for c, v in out.items()}
+
+
+_GRAPHS: Dict[str, FormulaGraph] = {}
+
+
+def template_hash(formulas: Dict[str, str], targets: Iterable[str]) -> str:
+    body = "\n".join(f"{a}{f}" for a, f in sorted(formulas.items()))
+    return hashlib.sha1(f"{sorted(targets)}\n{body}".encode()).hexdigest()[:16]
+
+
+def graph_for(sheet: Sheet, targets: Iterable[str]) -> FormulaGraph:
+    """Workbooks from the same template (same formulas) share one graph"""
+    targets = list(targets)
+    formulas = {a: v for a, v in sheet.items() if is_formula(v)}
+    key = template_hash(formulas, targets)
+    g = _GRAPHS.get(key)
+    if g is None:
+        if len(_GRAPHS) >= _MAX_GRAPHS:
+            _GRAPHS.pop(next(iter(_GRAPHS)))
+        g = _GRAPHS[key] = FormulaGraph(formulas, targets)
+    return g
+
+
+def evaluate_cells(sheet: Sheet, targets: Iterable[str]) -> Dict[str, object]:
+    """Values for `targets`: literal cells as they are, formula cells computed"""
+    targets = [t.strip().upper() for t in targets]
+    computed = graph_for(sheet, targets).evaluate(sheet)
+    return {t: computed[t] if t in computed else (None if is_formula(sheet.get(t)) else sheet.get(t))
+            for t in targets}
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Handle lifetimes + memory metric for long sessions (batch / daemon)
+#
+# The scripts work through locators and plain in-page data; the one place a
+# JSHandle still appears is page.wait_for_function(), which returns one per
+# wait. Every such handle is registered here against its own page and
+# disposed right after the wait (release_soon). HandleScope makes sure none
+# outlives its phase. Nothing here looks at other pages, so concurrent offers
+# never touch each other's handles. Leaks show up as JS heap growth, which is
+# what memory_sample reports.
+
+import asyncio
+import weakref
+from typing import Dict, List
+
+# page -> its handles still alive, oldest first
+_LIVE: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_PENDING: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()  # page -> disposals in flight
+
+
+def track(page, handle):
+    _LIVE.setdefault(page, []).append(handle)
+    return handle
+
+
+async def _dispose(page, handles: List) -> int:
+    live = _LIVE.get(page, [])
+    for h in handles:
+        if h in live:
+            live.remove(h)
+    await asyncio.gather(*(h.dispose() for h in handles), return_exceptions=True)
+    return len(handles)
+
+
+def release_soon(page, handle):
+    """Dispose `handle` in the background: the caller's wait doesn't grow by a round trip"""
+    track(page, handle)
+    task = asyncio.ensure_future(_dispose(page, [handle]))
+    pending = _PENDING.setdefault(page, set())
+    pending.add(task)
+    task.add_done_callback(pending.discard)
+
+
+class HandleScope:
+    """async with HandleScope(page, "fill"): ... - this page's handles made inside die at the end"""
+
+    totals = {"disposed": 0}
+
+    def __init__(self, page, name: str = ""):
+        self.page = page
+        self.name = name
+        self.before: set = set()
+
+    async def __aenter__(self):
+        self.before = {id(h) for h in _LIVE.get(self.page, ())}
+        return self
+
+    async def __aexit__(self, *exc):
+        pending = list(_PENDING.get(self.page, ()))
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        live = list(_LIVE.get(self.page, ()))
+        new = [h for h in live if id(h) not in self.before]
+        HandleScope.totals["disposed"] += await _dispose(self.page, new)
+        return False
+
+
+async def memory_sample(page) -> Dict:
+    """{"js_heap_mb"} for this page - the per-offer report"""
+    out = {"js_heap_mb": None}
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        try:
+            usage = await cdp.send("Runtime.getHeapUsage")
+            out["js_heap_mb"] = round(usage["usedSize"] / 2 ** 20, 1)
+        finally:
+            await cdp.detach()
+    except Exception:
+        pass  # not Chromium, or CDP sessions not allowed here
+    return out
+
+
+def format_memory(m: Dict) -> str:
+    heap = "-" if m.get("js_heap_mb") is None else f"{m['js_heap_mb']:.1f} MB"
+    return f"JS heap {heap}"
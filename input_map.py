@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Amount input per binding from one DOM-geometry snapshot: each block's currency
+# combobox is paired with the input to its right, and that input gets a marker
+# so the fallback path can click it directly instead of guessing pixel offsets
+
+from typing import Dict, List
+
+from value_injection import FORM_HELPERS_JS
+
+MARK_ATTR = "data-offer-amount"
+
+_PAIR_JS = """
+(items) => {
+""" + FORM_HELPERS_JS + """
+  document.querySelectorAll('[""" + MARK_ATTR + """]').forEach((el) => el.removeAttribute('""" + MARK_ATTR + """'));
+  return items.map((it, i) => {
+    const block = findBlock(it);
+    if (!block) return { label: it.label, found: false, input: false };
+    const input = findInput(block);
+    if (!input) return { label: it.label, found: true, id: block.id || null, input: false };
+    input.setAttribute('""" + MARK_ATTR + """', String(i));
+    const mode = (input.getAttribute('inputmode') || input.type || '').toLowerCase();
+    return {
+      label: it.label, found: true, id: block.id || null, input: true,
+      numeric: /^(numeric|decimal|number|tel)$/.test(mode),
+      name: input.getAttribute('aria-label') || input.name || input.id || null,
+    };
+  });
+}
+"""
+
+
+class InputMap:
+    """label -> marker locator of its amount input, from a single snapshot"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.slots: Dict[str, int] = {}
+        self.pairs: Dict[str, Dict] = {}
+
+    async def snapshot(self, page, items: List[Dict]) -> int:
+        """items: [{"label", "id"}]; returns how many bindings got an input"""
+        rows = await page.evaluate(_PAIR_JS, items)
+        self.pairs = {r["label"]: r for r in rows}
+        self.slots = {r["label"]: i for i, r in enumerate(rows) if r["input"]}
+        return len(self.slots)
+
+    def locator(self, page, label: str):
+        """Marked input for `label`, or None if the snapshot paired nothing"""
+        i = self.slots.get(label)
+        return None if i is None else page.locator(f'[{MARK_ATTR}="{i}"]').first
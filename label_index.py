@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# In-page label index: every binding label -> its live block and amount input,
+# kept current by a MutationObserver so re-rendered blocks never go stale
+
+from typing import Dict, List, Optional
+
+from value_injection import FORM_HELPERS_JS, FORM_ROOT_JS
+
+BLOCK_ATTR = "data-offer-block"
+INPUT_ATTR = "data-offer-input"
+
+# Installs window.__offerIndex once per document (again if the label set
+# changes or the form container was replaced). The observer watches the form
+# container only and re-indexes in a microtask after a block is added,
+# removed or re-id'd - listbox churn (opening, filtering) is ignored - and
+# moves the marker attributes to the new nodes, so a locator on
+# [data-offer-block="3"] always hits the live block. `gen` only moves when
+# some label's block or input actually changed. close() disconnects it.
+_INDEX_JS = """
+(labels) => {
+""" + FORM_ROOT_JS + """
+  let ix = window.__offerIndex;
+  const same = ix && ix.root.isConnected && ix.labels.length === labels.length &&
+               ix.labels.every((l, i) => l === labels[i]);
+  if (!same) {
+    if (ix) ix.observer.disconnect();
+    ix = window.__offerIndex = { labels, root: formRoot(), gen: 0, rebuilds: 0, map: [] };
+    ix.rebuild = () => {
+""" + FORM_HELPERS_JS + """
+      const map = labels.map((label) => {
+        const block = findBlock({ label });
+        return { block, input: block ? findInput(block) : null };
+      });
+      let changed = false;
+      map.forEach((m, i) => {
+        const old = ix.map[i] || {};
+        if (old.block !== m.block || old.input !== m.input) changed = true;
+        if (old.block && old.block !== m.block) old.block.removeAttribute('""" + BLOCK_ATTR + """');
+        if (old.input && old.input !== m.input) old.input.removeAttribute('""" + INPUT_ATTR + """');
+        if (m.block) m.block.setAttribute('""" + BLOCK_ATTR + """', String(i));
+        if (m.input) m.input.setAttribute('""" + INPUT_ATTR + """', String(i));
+      });
+      ix.map = map;
+      ix.rebuilds += 1;
+      if (changed) ix.gen += 1;
+    };
+    const relevant = (m) => !inListbox(m) && (m.type === 'attributes' ||
+      [...m.addedNodes, ...m.removedNodes].some((n) => n.nodeType === 1 && !isListbox(n)));
+    let queued = false;
+    ix.observer = new MutationObserver((muts) => {
+      if (queued || !muts.some(relevant)) return;
+      queued = true;
+      queueMicrotask(() => { queued = false; ix.rebuild(); });
+    });
+    ix.observer.observe(ix.root, { childList: true, subtree: true, attributes: true, attributeFilter: ['id'] });
+    ix.rebuild();
+  }
+  return {
+    gen: ix.gen,
+    rebuilds: ix.rebuilds,
+    entries: ix.map.map((m, i) => ({ label: labels[i], found: !!m.block, id: m.block ? (m.block.id || null) : null,
+                                     input: !!m.input })),
+  };
+}
+"""
+
+# Stops the observer and takes the markers off, so the recruiter's tab is left as it was
+_CLOSE_JS = """
+() => {
+  const ix = window.__offerIndex;
+  if (!ix) return false;
+  ix.observer.disconnect();
+  document.querySelectorAll('[""" + BLOCK_ATTR + """], [""" + INPUT_ATTR + """]').forEach((el) => {
+    el.removeAttribute('""" + BLOCK_ATTR + """');
+    el.removeAttribute('""" + INPUT_ATTR + """');
+  });
+  delete window.__offerIndex;
+  return true;
+}
+"""
+
+
+class LabelIndex:
+    """Python side of window.__offerIndex: one resolve() per pass, then marker locators"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget slots from an earlier page (the markers live in that page's DOM)"""
+        self.slots: Dict[str, int] = {}
+        self.inputs: Dict[str, int] = {}
+        self.gen: Optional[int] = None
+        self.rebuilds = 0
+
+    async def resolve(self, page, labels: List[str]) -> Dict[str, Optional[str]]:
+        """Install/refresh the index and return label -> live block id for every label found"""
+        res = await page.evaluate(_INDEX_JS, labels)
+        self.gen, self.rebuilds = res["gen"], res["rebuilds"]
+        self.slots = {e["label"]: i for i, e in enumerate(res["entries"]) if e["found"]}
+        self.inputs = {e["label"]: i for i, e in enumerate(res["entries"]) if e["input"]}
+        return {e["label"]: e["id"] for e in res["entries"] if e["found"]}
+
+    def block(self, page, label: str):
+        """Locator for the label's live block, or None if the index didn't find it"""
+        i = self.slots.get(label)
+        return None if i is None else page.locator(f'[{BLOCK_ATTR}="{i}"]').first
+
+    def input(self, page, label: str):
+        i = self.inputs.get(label)
+        return None if i is None else page.locator(f'[{INPUT_ATTR}="{i}"]').first
+
+    async def close(self, page):
+        """End of a run: disconnect the page's observer and forget the slots"""
+        try:
+            await page.evaluate(_CLOSE_JS)
+        except Exception:
+            pass  # tab already gone: nothing left to disconnect
+        self.reset()
@@ -2,121 +2,171 @@
 # Combined: Set currencies to INR + Fill Excel data into fields
 
 import asyncio
+import time
+from pathlib import Path
 from typing import Dict, Optional, Set
+from urllib.parse import urlsplit
 from playwright.async_api import async_playwright
-import openpyxl
+
+from audit_capture import AUDIT
+from cdp_input import CDPKeyboard, is_number
+from currency_discovery import discover_currency_fields
+from currency_options import OptionIndex
+from fill_plans import FillPlans, fingerprint, match_region, region_bindings, region_source, region_target
+from handle_scope import HandleScope, format_memory, memory_sample
+from input_map import InputMap
+from label_index import LabelIndex
+from network_policy import NetworkPolicy
+from preflight import print_report, validate_offers
+from readiness import Readiness
+from retry_queue import RetryQueue
+from run_history import record_run
+from run_journal import RunJournal
+from selector_cache import SelectorCache, template_key
+from tracing import Tracer
+from value_injection import inject_all
+from verify import diff, snapshot, write_report
+from workbook_reader import read_values
 
 CDP_URL = "http://127.0.0.1:9222"
-TARGET = "INR"
+REGION = "IND"  # regions.json: bindings + target currency per regional template
+TARGET = region_target(REGION)
+SOURCE = region_source(REGION)  # currency the template starts in
 EXCEL_FILE_PATH = r"/path/to/your/excel-file.xlsx"
+FILL_MODE = "keyboard"  # "keyboard" = type every digit, "inject" = set all values in one call
+VERIFY = True  # read every field back after the run and retry mismatches
+PIPELINE = "two-pass"  # "two-pass" = all currencies then all amounts, "fused" = one pass per block (typed)
+PREFLIGHT = True  # validate the workbook (blanks, annual = 12 x monthly, totals) before the first page action
+USE_PLANS = True  # fingerprint the form; known templates skip discovery via a compiled plan
+RESUME = True  # journal each step; a rerun snapshots the page and only touches fields still wrong
+LABEL_INDEX = True  # resolve every binding in one call; an in-page observer keeps blocks current
+CURRENCY_PICK = "direct"  # "direct" = click the cached option, "typed" = filter by typing TARGET
+HISTORY = True  # record timings / success per run in runs.sqlite (python run_history.py report)
+NETWORK_POLICY = False  # block images/fonts/analytics/chat widgets while the script works (network_policy.py)
+AUDIT_CAPTURE = True  # screenshot + field snapshot per offer into audit/, taken in the background
+INPUT_DISPATCH = "cdp"  # "cdp" = one pipelined CDP batch per key sequence, "cdp-insert" = numbers via insertText, "playwright"
 
-# Map page label → Excel cell
-BINDINGS = [
-    {"label_text": "Annual Salary", "excel_cell": "E21", "container_id": None},
-    {"label_text": "Pay Based on Frequency", "excel_cell": "D6", "container_id": None},
-    {"label_text": "Basic Pay (Annual)", "excel_cell": "E6", "container_id": None},
-    {"label_text": "House Rent Allowance (Monthly)", "excel_cell": "D7", "container_id": None},
-    {"label_text": "House Rent Allowance (annual)", "excel_cell": "E7", "container_id": None},
-    {"label_text": "General Allowance (Monthly)", "excel_cell": "D8", "container_id": None},
-    {"label_text": "General Allowance (annual)", "excel_cell": "E8", "container_id": None},
-    {"label_text": "Cash Salary (Monthly) Section", "excel_cell": "D10", "container_id": None},
-    {"label_text": "Cash Salary (Annual) Section", "excel_cell": "E10", "container_id": None},
-    {"label_text": "Employer PF Contribution (Monthly)", "excel_cell": "D13", "container_id": None},
-    {"label_text": "Employer PF Contribution (annual)", "excel_cell": "E13", "container_id": None},
-    {"label_text": "Total Base Salary (Monthly)", "excel_cell": "D16", "container_id": None},
-    {"label_text": "Total Base Salary (Annual)", "excel_cell": "E16", "container_id": None},
-    {"label_text": "Monthly Bonus", "excel_cell": "D19", "container_id": None},
-    {"label_text": "Annual Bonus", "excel_cell": "E19", "container_id": None},
-    {"label_text": "Total Cash Compensation (Monthly)", "excel_cell": "D21", "container_id": None},
-    {"label_text": "Total Cash Compensation (Annual)", "excel_cell": "E21", "container_id": None},
-]
+# Map page label → Excel cell (per region - extend in regions.json)
+BINDINGS = region_bindings(REGION)
 
 # ---------- CURRENCY CHANGER ----------
-async def change_currency_field(page, element):
+READY = Readiness()
+TRACE = Tracer("mr-offer")  # per-field phase timings -> traces/*.jsonl
+RETRY = RetryQueue()  # failed fields are retried after the main pass, with per-failure backoff
+OPTIONS = OptionIndex()  # where TARGET sits in the currency listbox, read once per page
+KEYS = CDPKeyboard()  # raw Input.* over one CDP session per page
+
+async def send_keys(page, *steps):
+    """("press", "Control+a"), ("type", "INR"), ("insert", "125000") - in order, one batch"""
+    await KEYS.send(page, *steps, batched=INPUT_DISPATCH != "playwright")
+
+async def currency_attempt(page, element) -> Optional[str]:
+    """One try at switching a combobox to TARGET: None on success, else the failure class"""
+    if CURRENCY_PICK == "direct":
+        failed = await pick_currency_direct(page, element)
+        if failed != "no_option":
+            return failed
+        await send_keys(page, ("press", "Escape"))  # option not in the list: reopen and filter by typing
+    OPTIONS.stats["typed"] += 1
     try:
-        # Step 1: Click USD to open dropdown
-        await element.click()
-        await page.wait_for_timeout(80)
+        # Step 1: Click USD and wait for the dropdown to actually open
+        await element.click(timeout=READY.caps["listbox_open"])
+        opened = await READY.listbox_open(page)
         
-        # Step 2: Type INR to filter dropdown
-        await page.keyboard.press("Control+a")
-        await page.keyboard.type(TARGET, delay=5)
+        # Step 2: Type INR to filter dropdown (real key events: the filter listens for them)
+        await send_keys(page, ("press", "Control+a"), ("type", TARGET))
         
-        # Step 3: CRITICAL - Wait for dropdown to filter properly so INR is highlighted
-        await page.wait_for_timeout(220)
+        # Step 3: CRITICAL - Wait until the filtered list shows INR
+        rendered = await READY.option_rendered(page, TARGET)
         
         # Step 4: Press ArrowDown to select INR from filtered list
-        await page.keyboard.press("ArrowDown")
-        await page.wait_for_timeout(30)
+        await send_keys(page, ("press", "ArrowDown"))
+        await READY.option_highlighted(page, TARGET)
         
-        # Step 5: Press Enter to confirm INR selection
-        await page.keyboard.press("Enter")
-        await page.wait_for_timeout(30)
-        
-        return True
+        # Step 5: Press Enter and wait for the combobox to show INR
+        await send_keys(page, ("press", "Enter"))
+        if await READY.committed(page, element, TARGET):
+            return None
+        await send_keys(page, ("press", "Escape"))  # don't leave a half-open listbox for the next field
+        return "dropdown" if not opened else "option" if not rendered else "commit"
     except Exception as e:
         print(f"Failed: {e}")
-        return False
+        return "error"
+
+async def pick_currency_direct(page, element) -> Optional[str]:
+    """Open the dropdown and click the TARGET option itself; "no_option" -> use the typed path"""
+    try:
+        await element.click(timeout=READY.caps["listbox_open"])
+        if not await READY.options_listed(page):
+            return "no_option"
+        if not await OPTIONS.pick(page, TARGET):
+            return "no_option"
+        await OPTIONS.option(page).click(timeout=READY.caps["committed"])
+        if await READY.committed(page, element, TARGET):
+            OPTIONS.stats["direct"] += 1
+            return None
+        await send_keys(page, ("press", "Escape"))
+        return "commit"
+    except Exception as e:
+        print(f"Failed: {e}")
+        return "error"
+
+async def change_currency_field(page, element, name: Optional[str] = None, relocate=None) -> bool:
+    """One attempt now; if `name` is given a failure is queued on RETRY instead of retried inline.
+
+    `relocate()` re-resolves the control for the deferred attempt: by then the
+    block may have re-rendered and the locator we clicked point at nothing.
+    """
+    failed = await currency_attempt(page, element)
+    if failed and name:
+        async def relocate_and_switch(attempt: int) -> Optional[str]:
+            with TRACE.span(name, "locate") as sp:
+                fresh = await relocate() if relocate else element
+                sp.ok = bool(await fresh.count())
+            return await currency_attempt(page, fresh) if sp.ok else "not_found"
+        RETRY.defer(name, "currency", failed, relocate_and_switch)
+    return failed is None
+
+async def block_combo(page, label_text: str, container_id: Optional[str] = None):
+    """Currency combobox of a binding's live block"""
+    block = await get_block(page, label_text, container_id)
+    return block.locator('[role="combobox"], button[aria-expanded], button').first
+
+def _by_id(page, name: str, combo: bool = False):
+    """relocate() for a field known by its block id; discovery's marker-only fields have none"""
+    if name.startswith("["):
+        return None
+
+    async def relocate():
+        block = page.locator(f"#{name}")
+        return block.locator('[role="combobox"], button[aria-expanded], button').first if combo else block
+    return relocate
 
 async def change_all_currencies(page):
-    print("Step 1: Changing currencies from USD to INR...")
-    all_elements = await page.query_selector_all('[id^="spl-form-element_"]')
-    currency_fields = []
-    
-    for element in all_elements:
-        try:
-            text_content = await element.text_content()
-            if text_content and "USD" in text_content:
-                element_id = await element.get_attribute("id")
-                currency_fields.append(element)
-        except:
-            continue
-    
-    if not currency_fields:
-        print("No currency fields found! Trying alternative approach...")
-        usd_elements = await page.query_selector_all('*:has-text("USD")')
-        for element in usd_elements:
-            try:
-                tag_name = await element.evaluate("el => el.tagName.toLowerCase()")
-                if tag_name in ['div', 'button', 'select', 'input']:
-                    bbox = await element.bounding_box()
-                    if bbox and bbox['width'] > 20 and bbox['height'] > 20:
-                        currency_fields.append(element)
-            except:
-                continue
-    
-    currency_fields = currency_fields[:17]
-    
-    # Remove duplicates by position
-    unique_fields = []
-    for field in currency_fields:
-        try:
-            bbox = await field.bounding_box()
-            if bbox:
-                is_duplicate = False
-                for existing in unique_fields:
-                    existing_bbox = await existing.bounding_box()
-                    if existing_bbox:
-                        if abs(bbox['x'] - existing_bbox['x']) < 10 and abs(bbox['y'] - existing_bbox['y']) < 10:
-                            is_duplicate = True
-                            break
-                if not is_duplicate:
-                    unique_fields.append(field)
-            else:
-                unique_fields.append(field)
-        except:
-            unique_fields.append(field)
+    print(f"Step 1: Changing currencies from {SOURCE} to {TARGET}...")
+
+    # One in-page pass: ids, tags, boxes and current currency for every candidate
+    with TRACE.span("*", "discovery"):
+        found = await discover_currency_fields(page, SOURCE, limit=17)
+    if found["fields"] and found["fields"][0]["via"] == "fallback":
+        print("No currency fields found! Used alternative approach...")
+    print(f"Discovery: {len(found['fields'])} fields from {found['candidates']} candidates "
+          f"in {found['round_trips']} round trip(s)")
+    unique_fields = [(f["id"] or f["selector"], page.locator(f["selector"])) for f in found["fields"]]
     
     # Change currencies
     successful = 0
-    for i, field in enumerate(unique_fields, 1):
+    for i, (name, field) in enumerate(unique_fields, 1):
         print(f"Changing currency {i}/{len(unique_fields)}...", end=" ")
-        if await change_currency_field(page, field):
+        with TRACE.span(name, "currency") as sp:
+            sp.ok = await change_currency_field(page, field, name, relocate=_by_id(page, name))
+        if sp.ok:
             successful += 1
             print("Done")
         else:
-            print("Failed")
-        await page.wait_for_timeout(100)
+            print("Deferred")
+        with TRACE.span(name, "settle"):
+            await READY.form_settled(page, quiet_ms=30)
     
     print(f"Currency change: {successful}/{len(unique_fields)} fields changed to {TARGET}")
     return successful > 0
@@ -134,24 +184,48 @@ def _fmt_num(v) -> str:
         return s
 
 def read_cells_once(path: str, cells: Set[str]) -> Dict[str, str]:
-    wb = openpyxl.load_workbook(path, data_only=True, read_only=True)
-    sh = wb[wb.sheetnames[0]]
-    out: Dict[str, str] = {}
-    for addr in cells:
-        try:
-            out[addr] = _fmt_num(sh[addr].value)
-        except Exception:
-            out[addr] = ""
-    wb.close()
-    return out
+    # One streaming pass over just the needed rows; unchanged files come from cache.
+    # Also takes CSV / JSON exports of the sheet.
+    raw = read_values(path, cells)
+    return {addr: _fmt_num(raw.get(addr)) for addr in cells}
 
 _ID_CACHE: Dict[str, str] = {}
+SELECTORS = SelectorCache()  # on-disk copy of _ID_CACHE per offer template
+LABELS = LabelIndex()
+
+async def index_labels(page):
+    """All bindings -> live blocks in one call (replaces SELECTORS.warm's id check)"""
+    ids = await LABELS.resolve(page, [b["label_text"] for b in BINDINGS])
+    for label, bid in ids.items():
+        if bid:
+            _ID_CACHE[label] = bid
+    SELECTORS.key = template_key(page)
+    print(f"Label index: {len(ids)}/{len(BINDINGS)} bindings on the page (generation {LABELS.gen})")
+
+async def warm_selectors(page):
+    if LABEL_INDEX:
+        await index_labels(page)
+    else:
+        await SELECTORS.warm(page, _ID_CACHE)
 
 async def get_block(page, label_text: str, container_id: Optional[str]):
+    # Marker the in-page index keeps on the live block. It only dies with the
+    # observer (navigation, the form container replaced): then re-index once.
+    indexed = LABELS.block(page, label_text) if LABEL_INDEX else None
+    if indexed is not None and not await indexed.count():
+        await index_labels(page)
+        indexed = LABELS.block(page, label_text)
+        indexed = indexed if indexed is not None and await indexed.count() else None
+    if indexed is not None:
+        SELECTORS.index_hit()
+        return indexed
+
     cached = _ID_CACHE.get(label_text)
     if cached:
         blk = page.locator(f"#{cached}")
-        if await blk.count():
+        # Ids confirmed by SELECTORS.warm() this run need no extra count()
+        if label_text in SELECTORS.validated or await blk.count():
+            SELECTORS.hit()
             return blk.first
 
     if container_id:
@@ -159,6 +233,7 @@ async def get_block(page, label_text: str, container_id: Optional[str]):
         if await blk.count():
             return blk.first
 
+    SELECTORS.miss()
     blk = page.locator('[id^="spl-form-element_"]').filter(
         has=page.get_by_text(label_text, exact=False)
     ).first
@@ -174,16 +249,16 @@ async def focus_value_box_via_tab(page, block) -> bool:
     try:
         currency = block.locator('[role="combobox"], button[aria-expanded], button').first
         await currency.click()
-        await page.keyboard.press("Escape")
-        await page.keyboard.press("Tab")
+        await send_keys(page, ("press", "Escape"), ("press", "Tab"))
         return True
     except:
         return False
 
 async def type_into_focused(page, value: str) -> bool:
     try:
-        await page.keyboard.press("Control+a")
-        await page.keyboard.type(value, delay=5)
+        # Numbers can go in as one insertText over the selection (an input event, no key events)
+        insert = INPUT_DISPATCH == "cdp-insert" and is_number(value)
+        await send_keys(page, ("press", "Control+a"), ("insert" if insert else "type", value))
         return True
     except:
         return False
@@ -192,43 +267,82 @@ async def fill_field(page, label_text: str, excel_value: str, container_id: Opti
     if not excel_value:
         return False
 
+    async def relocate_and_fill(attempt: int) -> Optional[str]:
+        with TRACE.span(label_text, "locate") as sp:
+            block = await get_block(page, label_text, container_id)
+            sp.ok = bool(await block.count())
+        return await fill_attempt(page, label_text, block, excel_value, attempt - 1) if sp.ok else "not_found"
+
     try:
-        block = await get_block(page, label_text, container_id)
-        if not await block.count():
+        with TRACE.span(label_text, "locate") as sp:
+            block = await get_block(page, label_text, container_id)
+            sp.ok = bool(await block.count())
+        if not sp.ok:
+            RETRY.defer(label_text, "amount", "not_found", relocate_and_fill)
             return False
+        return await fill_block(page, label_text, block, excel_value)
+    except:
+        return False
 
-        # Method 1: Tab navigation
-        if await focus_value_box_via_tab(page, block) and await type_into_focused(page, excel_value):
-            return True
-
-        # Method 2: Direct click fallback
-        bb = await block.bounding_box()
-        if bb:
-            positions = [
-                (bb["x"] + bb["width"] - 14, bb["y"] + bb["height"] / 2),
-                (bb["x"] + bb["width"] - 50, bb["y"] + bb["height"] / 2),
-                (bb["x"] + bb["width"] - 100, bb["y"] + bb["height"] / 2)
-            ]
-            
-            for x, y in positions:
-                try:
-                    await page.mouse.click(x, y)
-                    if await type_into_focused(page, excel_value):
-                        return True
-                except:
-                    continue
+INPUTS = InputMap()  # amount input paired with each currency combobox (one snapshot)
 
+async def amount_input(page, label_text: str, fresh: bool = False):
+    """Locator for the binding's amount input: live index marker, else the geometry snapshot"""
+    if LABEL_INDEX and not fresh:
+        loc = LABELS.input(page, label_text)
+        if loc is not None:
+            return loc
+    if fresh or not INPUTS.slots:
+        items = [{"label": b["label_text"], "id": _ID_CACHE.get(b["label_text"]) or b.get("container_id")}
+                 for b in BINDINGS]
+        with TRACE.span("*", "pair_inputs"):
+            await INPUTS.snapshot(page, items)
+    return INPUTS.locator(page, label_text)
+
+async def fill_attempt(page, label_text: str, block, excel_value: str, attempt: int = 0) -> Optional[str]:
+    """Attempt 0 tabs over from the currency button; retries click the paired input itself"""
+    try:
+        if attempt == 0:
+            # Method 1: Tab navigation
+            with TRACE.span(label_text, "focus") as sp:
+                sp.ok = await focus_value_box_via_tab(page, block)
+            if not sp.ok:
+                return "focus"
+            with TRACE.span(label_text, "type") as sp:
+                sp.ok = await type_into_focused(page, excel_value)
+            return None if sp.ok else "type"
+
+        # Method 2: one click on the input paired with the currency combobox
+        # (a second retry re-pairs, in case the block re-rendered in between)
+        with TRACE.span(label_text, "fallback") as sp:
+            sp.retries = attempt
+            sp.ok = False
+            box = await amount_input(page, label_text, fresh=attempt > 1)
+            if box is None:
+                return "not_found"
+            await box.click(timeout=READY.caps["value_committed"] * 2)
+            sp.ok = await type_into_focused(page, excel_value)
+        return None if sp.ok else "type"
     except:
-        pass
-        
-    return False
+        return "error"
+
+async def fill_block(page, label_text: str, block, excel_value: str) -> bool:
+    """Type the value into an already resolved block; a failure goes to RETRY"""
+    failed = await fill_attempt(page, label_text, block, excel_value)
+    if failed:
+        RETRY.defer(label_text, "amount", failed,
+                    lambda n: fill_attempt(page, label_text, block, excel_value, n))
+    return failed is None
 
-async def fill_excel_data(page):
+async def fill_excel_data(page, excel_path: Optional[str] = None, warm: bool = True):
     print("Step 2: Reading Excel and filling data...")
     
     # Read all cells at once
     needed = {b["excel_cell"] for b in BINDINGS}
-    excel_values = read_cells_once(EXCEL_FILE_PATH, needed)
+    excel_values = read_cells_once(excel_path or EXCEL_FILE_PATH, needed)
+    if warm:
+        await warm_selectors(page)
+    injected = await inject_all(page, BINDINGS, excel_values, _ID_CACHE, TRACE) if FILL_MODE == "inject" else {}
     
     filled = 0
     for i, b in enumerate(BINDINGS):
@@ -236,42 +350,371 @@ async def fill_excel_data(page):
         if v:
             print(f"[{i+1:2d}] {b['label_text']}: {v}", end=" ")
             
+            if injected.get(b["label_text"], {}).get("ok"):
+                filled += 1
+                print("✅ (inject)")
+                continue
             ok = await fill_field(page, b["label_text"], v, b.get("container_id"))
             if ok:
                 filled += 1
                 print("✅")
+                with TRACE.span(b["label_text"], "settle"):
+                    await READY.value_committed(page, v)
             else:
-                print("✗")
-            
-            await page.wait_for_timeout(25)
+                print("✗ (retry later)")
         else:
             print(f"[{i+1:2d}] {b['label_text']}: (empty)")
     
     print(f"Data entry: {filled}/{len(BINDINGS)} fields filled")
+    SELECTORS.save(_ID_CACHE)
+    SELECTORS.print_stats()
     return filled
 
+# ---------- FUSED PIPELINE ----------
+def start_excel_read(excel_path: Optional[str] = None, after: Optional[asyncio.Future] = None) -> asyncio.Future:
+    """Read the workbook in a worker thread so it overlaps connect + page work"""
+    needed = {b["excel_cell"] for b in BINDINGS}
+
+    async def read():
+        if after is not None:
+            await after  # pre-flight parses the same cells: this read is then a cache hit
+        return await asyncio.to_thread(read_cells_once, excel_path or EXCEL_FILE_PATH, needed)
+    return asyncio.ensure_future(read())
+
+async def run_offer_fused(page, excel_values) -> Dict:
+    """One pass per block: resolve -> currency -> amount, reusing the resolved locator"""
+    print("Fused pass: currency + amount per block...")
+    await warm_selectors(page)
+    with TRACE.span("*", "discovery"):
+        found = await discover_currency_fields(page, SOURCE, limit=None)
+    src_ids = {f["id"] for f in found["fields"] if f["id"]}
+
+    # First point the workbook is actually needed
+    values = await excel_values
+    changed = filled = 0
+    for i, b in enumerate(BINDINGS):
+        label = b["label_text"]
+        v = values.get(b["excel_cell"], "")
+        print(f"[{i+1:2d}] {label}: {v or '(empty)'}", end=" ")
+
+        with TRACE.span(label, "locate") as sp:
+            block = await get_block(page, label, b.get("container_id"))
+            sp.ok = bool(await block.count())
+        if not sp.ok:
+            if v:
+                await fill_field(page, label, v, b.get("container_id"))  # queues the re-locate
+            print("✗ (not found, retry later)")
+            continue
+
+        bid = _ID_CACHE.get(label)
+        if bid in src_ids or (bid is None and SOURCE in (await block.text_content() or "")):
+            combo = block.locator('[role="combobox"], button[aria-expanded], button').first
+            with TRACE.span(label, "currency") as sp:
+                sp.ok = await change_currency_field(
+                    page, combo, label, relocate=lambda b=b: block_combo(page, b["label_text"], b.get("container_id")))
+            changed += sp.ok
+            src_ids.discard(bid)  # done, or queued on RETRY
+
+        if v and await fill_block(page, label, block, v):
+            filled += 1
+            print("✅")
+            with TRACE.span(label, "settle"):
+                await READY.value_committed(page, v)
+        else:
+            print("✗ (retry later)" if v else "")
+
+    # Currency fields that no binding covers still get switched
+    leftovers = [f for f in found["fields"] if f["id"] in src_ids]
+    for f in leftovers:
+        name = f["id"] or f["selector"]
+        with TRACE.span(name, "currency") as sp:
+            sp.ok = await change_currency_field(page, page.locator(f["selector"]), name, relocate=_by_id(page, name))
+        changed += sp.ok
+
+    print(f"Fused pass: {changed} currencies changed to {TARGET}, {filled}/{len(BINDINGS)} fields filled")
+    SELECTORS.save(_ID_CACHE)
+    SELECTORS.print_stats()
+    return {"currency": changed > 0, "filled": filled}
+
+# ---------- COMPILED PLANS ----------
+PLANS = FillPlans()
+
+async def run_plan(page, plan: Dict, fp: Dict, excel_path: Optional[str] = None) -> Dict:
+    """Recognised template: ids, currencies and input strategy come from the plan, no discovery"""
+    global BINDINGS, TARGET, FILL_MODE
+    print(f"Template {plan['fingerprint']} recognised ({plan['region']}), using compiled plan")
+    BINDINGS = [
+        {"label_text": s["label_text"], "excel_cell": s["excel_cell"], "container_id": s["container_id"]}
+        for s in plan["steps"]
+    ]
+    TARGET = plan["target"]
+    FILL_MODE = plan["steps"][0]["input"] if plan["steps"] else FILL_MODE
+    for s in plan["steps"]:
+        _ID_CACHE[s["label_text"]] = s["container_id"]
+    # The fingerprint covers every (id, label) pair, so a match already confirms the ids
+    SELECTORS.validated = set(_ID_CACHE)
+    if LABEL_INDEX:
+        await index_labels(page)  # still one call, and it survives re-renders with new ids
+
+    current = {b["id"]: b["currency"] for b in fp["blocks"]}
+    ids = [s["container_id"] for s in plan["steps"] if s["currency"]] + plan["extra_currency_ids"]
+    to_change = [bid for bid in dict.fromkeys(ids) if current.get(bid) not in (None, TARGET)]
+    changed = 0
+    for bid in to_change:
+        with TRACE.span(bid, "currency") as sp:
+            sp.ok = await change_currency_field(page, page.locator(f"#{bid}"), bid, relocate=_by_id(page, bid))
+        changed += sp.ok
+        with TRACE.span(bid, "settle"):
+            await READY.form_settled(page, quiet_ms=30)
+    print(f"Currency change: {changed} fields changed to {TARGET} (plan)")
+    changed += len((await RETRY.drain())["currency"])  # before typing: a late switch re-renders amounts
+
+    filled = await fill_excel_data(page, excel_path, warm=False)
+    return {"currency": changed > 0 or not to_change, "filled": filled}
+
+# ---------- VERIFY ----------
+async def repair(page, mismatches, expected: Dict[str, str], phase: str) -> list:
+    """Redo just the listed currency / amount mismatches (from verify.diff)"""
+    by_label = {b["label_text"]: b for b in BINDINGS}
+    retried = []
+    # Currency first: switching it can re-render the amount next to it
+    for d in sorted(mismatches, key=lambda d: d["field"] != "currency"):
+        b = by_label[d["label"]]
+        ok = False
+        with TRACE.span(d["label"], phase) as sp:
+            if d["field"] == "currency":
+                block = await get_block(page, d["label"], b.get("container_id"))
+                combo = block.locator('[role="combobox"], button[aria-expanded], button').first
+                ok = await change_currency_field(
+                    page, combo, d["label"], relocate=lambda b=b: block_combo(page, b["label_text"], b.get("container_id")))
+            elif d["field"] == "amount":
+                ok = await fill_field(page, d["label"], expected[d["cell"]], b.get("container_id"))
+            sp.ok = ok
+        retried.append(dict(d, retry_ok=ok))
+    # Whatever failed above gets its fallbacks now, with backoff
+    recovered = await RETRY.drain()
+    for d in retried:
+        if d["label"] in recovered.get(d["field"], ()):
+            d["retry_ok"] = True
+    return retried
+
+async def verify_and_retry(page, excel_path: Optional[str] = None) -> Dict:
+    """Read every bound field back in one call and redo only the ones that differ"""
+    needed = {b["excel_cell"] for b in BINDINGS}
+    expected = read_cells_once(excel_path or EXCEL_FILE_PATH, needed)  # cached, no re-parse
+
+    with TRACE.span("*", "verify"):
+        before = diff(await snapshot(page, BINDINGS, _ID_CACHE), BINDINGS, expected, TARGET)
+
+    retried = await repair(page, before, expected, "retry")
+
+    after = before
+    if retried:
+        await READY.form_settled(page, quiet_ms=60)
+        after = diff(await snapshot(page, BINDINGS, _ID_CACHE), BINDINGS, expected, TARGET)
+
+    report = {
+        "checked": len(BINDINGS),
+        "mismatched_before": before,
+        "retried": retried,
+        "mismatched_after": after,
+        "ok": not after,
+    }
+    path = write_report(report, "mr-offer")
+    print(f"Verify: {len(before)} mismatches, {len(retried)} retried, {len(after)} left -> {path}")
+    for d in after:
+        print(f"  ✗ {d['label']} {d['field']}: expected {d['expected']!r}, page has {d['actual']!r}")
+    return report
+
+# ---------- RESUME ----------
+JOURNAL = RunJournal()  # .journal/<page+workbook>.jsonl
+
+async def resume_offer(page, fp: Dict, excel_path: Optional[str] = None) -> Optional[Dict]:
+    """Rerun of a journaled offer: one snapshot, then only the fields still wrong.
+
+    None when no earlier run touched this page - the normal pipeline runs instead.
+    """
+    if not JOURNAL.resumable:
+        return None
+    for label, bid in JOURNAL.ids().items():
+        _ID_CACHE.setdefault(label, bid)
+    needed = {b["excel_cell"] for b in BINDINGS}
+    expected = read_cells_once(excel_path or EXCEL_FILE_PATH, needed)
+
+    with TRACE.span("*", "snapshot"):
+        snap = await snapshot(page, BINDINGS, _ID_CACHE)
+    wrong = diff(snap, BINDINGS, expected, TARGET)
+    # Every currency that isn't TARGET yet, bound or not (not just USD, no 17-field
+    # cap), comes off the fingerprint; the snapshot only decides the amounts
+    switch = [b["id"] for b in fp["blocks"] if b["currency"] not in (None, TARGET)]
+    amounts = [d for d in wrong if d["field"] != "currency"]
+    print(f"Resume: {'finished' if JOURNAL.completed else 'partial'} earlier run, "
+          f"{len(switch)} currencies to switch, {len(amounts)} bound field(s) still wrong")
+
+    # Currency first: switching it can re-render the amount next to it
+    retried = []
+    for bid in switch:
+        with TRACE.span(bid, "repair") as sp:
+            combo = page.locator(f"#{bid}").locator('[role="combobox"], button[aria-expanded], button').first
+            sp.ok = await change_currency_field(page, combo, bid, relocate=_by_id(page, bid, combo=True))
+        retried.append({"label": bid, "field": "currency", "retry_ok": sp.ok})
+    recovered = await RETRY.drain()
+    for d in retried:
+        d["retry_ok"] = d["retry_ok"] or d["label"] in recovered["currency"]
+
+    if amounts and LABEL_INDEX:
+        await index_labels(page)
+    retried += await repair(page, amounts, expected, "repair")
+
+    # Missing blocks went through repair() too (never ok), so they're already in `retried`
+    left = [d for d in retried if not d["retry_ok"]]
+    result = {
+        "currency": not any(d["field"] == "currency" for d in left),
+        "filled": sum(1 for b in BINDINGS if expected.get(b["excel_cell"]))
+                  - sum(1 for d in left if d["field"] in ("amount", "block") and expected.get(d["cell"])),
+        "resumed": len(retried),
+    }
+    if not retried:
+        # Nothing touched: the start snapshot already is the verification
+        result["verify"] = {"checked": len(BINDINGS), "mismatched_before": wrong, "retried": [],
+                            "mismatched_after": wrong, "ok": not wrong}
+        print("Resume: offer already complete, nothing to do" if not wrong else
+              f"Resume: {len(wrong)} field(s) can't be fixed here")
+    return result
+
 # ---------- MAIN ----------
+async def run_offer(page, excel_path: Optional[str] = None, excel_values=None) -> Dict:
+    """Currency change + Excel fill on one prospect page"""
+    print("Starting combined currency change + Excel data filling...")
+    started = time.perf_counter()
+    first_span = len(TRACE.spans)
+    TRACE.bind(page)
+    RETRY.reset()
+    LABELS.reset()
+    INPUTS.reset()
+    KEYS.reset()
+
+    fp = plan = result = None
+    if USE_PLANS or RESUME:
+        with TRACE.span("*", "fingerprint"):
+            fp = await fingerprint(page)
+    if USE_PLANS:
+        plan = PLANS.lookup(fp)
+        if not plan:
+            guess = match_region(fp)
+            if guess and guess != REGION:
+                print(f"⚠️ Form looks like a {guess} template but REGION is {REGION}")
+
+    # Each phase runs in a HandleScope: any ElementHandle made inside is disposed at its end
+    async with HandleScope(page, "fill"):
+        if RESUME:
+            TRACE.on_span = JOURNAL.span
+            JOURNAL.open(page.url, excel_path or EXCEL_FILE_PATH)
+            result = await resume_offer(page, fp, excel_path)
+
+        if result is not None:
+            pass
+        elif plan:
+            result = await run_plan(page, plan, fp, excel_path)
+        elif PIPELINE == "fused":
+            result = await run_offer_fused(page, excel_values or start_excel_read(excel_path))
+        else:
+            # Step 1: Change all currencies to INR, then retry the ones that failed
+            async with HandleScope(page, "currency"):
+                currency_success = await change_all_currencies(page)
+                currency_success = bool((await RETRY.drain())["currency"]) or currency_success
+            
+            # Wait for the form to finish re-rendering after currency changes
+            with TRACE.span("*", "settle"):
+                await READY.form_settled(page, quiet_ms=100)
+            
+            # Step 2: Fill Excel data into fields
+            filled_count = await fill_excel_data(page, excel_path)
+            result = {"currency": currency_success, "filled": filled_count}
+
+        # Fields that failed in the main pass: fallbacks run now, not inline
+        recovered = await RETRY.drain()
+        result["filled"] += len(recovered["amount"])
+        result["currency"] = result["currency"] or bool(recovered["currency"])
+
+    if VERIFY and "verify" not in result:
+        # Step 3: One read-back of every field, retry only what differs
+        async with HandleScope(page, "verify"):
+            result["verify"] = await verify_and_retry(page, excel_path)
+
+    if LABEL_INDEX:
+        await LABELS.close(page)  # no observer left running in the recruiter's tab
+
+    # Per-offer memory: should stay flat over a multi-hour batch / daemon session
+    result["memory"] = await memory_sample(page)
+    print(f"Memory: {format_memory(result['memory'])}")
+    result["input"] = dict(KEYS.stats)
+
+    if AUDIT_CAPTURE:
+        # Evidence for the reviewer: only queued here, captured by a background task
+        v = result.get("verify") or {}
+        result["audit_depth"] = AUDIT.submit(
+            page, Path(excel_path or EXCEL_FILE_PATH).stem, BINDINGS, _ID_CACHE,
+            meta={"region": REGION, "target": TARGET, "filled": result["filled"], "verified": v.get("ok"),
+                  "mismatches": v.get("mismatched_after", [])})
+
+    # Unknown template that went well: compile it so next time skips discovery
+    if USE_PLANS and not plan and "resumed" not in result and result.get("verify", {}).get("ok", True):
+        if PLANS.compile(fp, REGION, BINDINGS, _ID_CACHE, FILL_MODE):
+            print(f"Compiled fill plan for template {fp['hash']}")
+    if RESUME:
+        JOURNAL.finish(result.get("verify", {}).get("ok", bool(result["filled"])), ids=dict(_ID_CACHE))
+    if HISTORY:
+        v = result.get("verify")
+        record_run(TRACE.spans[first_span:], TRACE.name, host=urlsplit(page.url).netloc,
+                   template=fp["hash"] if fp else SELECTORS.key, region=REGION,
+                   wall_ms=(time.perf_counter() - started) * 1000, filled=result["filled"], total=len(BINDINGS),
+                   verified=v["ok"] if v else None, mismatches=len(v["mismatched_after"]) if v else 0,
+                   memory=result["memory"])
+    return result
+
 async def main():
+    # Pre-flight (and, fused, the workbook read) run in a thread while the driver
+    # starts and connects; a bad workbook is still rejected before the page is touched
+    checking = asyncio.ensure_future(asyncio.to_thread(
+        validate_offers, [EXCEL_FILE_PATH], region=REGION, bindings=BINDINGS)) if PREFLIGHT else None
+    excel_values = start_excel_read(after=checking) if PIPELINE == "fused" else None
     async with async_playwright() as p:
         browser = await p.chromium.connect_over_cdp(CDP_URL)
         page = browser.contexts[0].pages[-1]
+        if checking is not None:
+            checked = await checking
+            if checked[0]["errors"] or checked[0]["warnings"]:
+                print_report(checked)
+            if not checked[0]["ok"]:
+                if excel_values is not None:
+                    excel_values.cancel()
+                return
         await page.bring_to_front()
 
-        print("Starting combined currency change + Excel data filling...")
-        
-        # Step 1: Change all currencies to INR
-        currency_success = await change_all_currencies(page)
-        
-        # Wait for page to settle after currency changes
-        await page.wait_for_timeout(1000)
-        
-        # Step 2: Fill Excel data into fields
-        filled_count = await fill_excel_data(page)
+        policy = await NetworkPolicy().apply(page) if NETWORK_POLICY else None
+        try:
+            result = await run_offer(page, excel_values=excel_values)
+        finally:
+            if policy:
+                await policy.restore()  # the recruiter's tab loads normally again
         
         # Summary
         print(f"\nCompleted:")
-        print(f"- Currency change: {'✅' if currency_success else '❌'}")
-        print(f"- Data entry: {filled_count} fields filled")
+        print(f"- Currency change: {'✅' if result['currency'] else '❌'}")
+        print(f"- Data entry: {result['filled']} fields filled")
+        if "verify" in result:
+            print(f"- Verified: {'✅' if result['verify']['ok'] else '❌'}")
+        READY.print_summary()
+        RETRY.print_stats()
+        print(f"Keyboard: {KEYS.summary()}")
+        if OPTIONS.stats["reads"]:
+            print(f"Currency picks: {OPTIONS.stats['direct']} direct, {OPTIONS.stats['typed']} typed")
+        if policy:
+            policy.print_stats()
+        await AUDIT.flush()  # the capture needs the tab, so finish it before disconnecting
+        AUDIT.print_stats()
+        TRACE.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Opt-in request blocking: while the script works on a form, stop the ATS page
+# from pulling images, fonts, analytics and chat widgets
+#
+# Uses Chrome's own URL blocklist (CDP Network.setBlockedURLs) rather than
+# page.route(): nothing is intercepted, so the ATS's own xhr/fetch/scripts
+# never pass through Python and the HTTP cache stays on.
+
+from typing import Dict, Iterable, List, Optional
+
+# Resource classes that never matter for filling a form, as URL wildcards
+# (the blocklist matches URLs, not resource types)
+BLOCK_TYPES = {
+    "image": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico"],
+    "font": ["*.woff*", "*.ttf*", "*.otf*", "*.eot*"],
+    "media": ["*.mp4*", "*.webm*", "*.mp3*", "*.m3u8*"],
+}
+
+# Third-party noise (analytics, session replay, chat widgets, beacons)
+BLOCK_PATTERNS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*segment.io*", "*segment.com*",
+    "*hotjar.com*", "*fullstory.com*", "*newrelic.com*", "*nr-data.net*", "*sentry.io*",
+    "*intercom.io*", "*intercomcdn.io*", "*drift.com*", "*zdassets.com*", "*zopim*", "*/beacon*", "*/collect?*",
+]
+
+# No size is known for a request that never happens - typical sizes, for the report
+EST_BYTES = {"image": 25_000, "media": 250_000, "font": 40_000, "script": 60_000, "other": 2_000}
+
+
+class NetworkPolicy:
+    """Chrome-side URL blocklist on the page until restore(); blocked requests are counted"""
+
+    def __init__(self, block_types: Optional[Iterable[str]] = None,
+                 block_patterns: Optional[Iterable[str]] = None):
+        types = BLOCK_TYPES if block_types is None else {t: BLOCK_TYPES[t] for t in block_types}
+        self.urls: List[str] = [u for us in types.values() for u in us] + list(
+            BLOCK_PATTERNS if block_patterns is None else block_patterns)
+        self.cdp = None
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.allowed = 0
+
+    def _failed(self, ev: Dict):
+        if ev.get("blockedReason") != "inspector":  # "inspector" = our blocklist
+            return
+        kind = (ev.get("type") or "other").lower()
+        kind = kind if kind in EST_BYTES else "other"
+        s = self.stats.setdefault(kind, {"blocked": 0})
+        s["blocked"] += 1
+
+    def _finished(self, ev: Dict):
+        self.allowed += 1
+
+    async def apply(self, page):
+        try:
+            self.cdp = await page.context.new_cdp_session(page)
+            self.cdp.on("Network.loadingFailed", self._failed)
+            self.cdp.on("Network.loadingFinished", self._finished)
+            await self.cdp.send("Network.enable")
+            await self.cdp.send("Network.setBlockedURLs", {"urls": self.urls})
+        except Exception as e:  # not Chromium: run without the policy
+            print(f"Network policy not applied: {e}")
+            self.cdp = None
+        return self
+
+    async def restore(self):
+        """Back to normal loading; requests already blocked are not replayed"""
+        if self.cdp is not None:
+            try:
+                await self.cdp.send("Network.setBlockedURLs", {"urls": []})
+                await self.cdp.detach()
+            except Exception as e:
+                print(f"Network policy not removed cleanly: {e}")
+            self.cdp = None
+
+    def saved(self) -> Dict[str, int]:
+        requests = sum(s["blocked"] for s in self.stats.values())
+        est = sum(s["blocked"] * EST_BYTES.get(kind, EST_BYTES["other"]) for kind, s in self.stats.items())
+        return {"requests": requests, "est_bytes": est, "allowed": self.allowed}
+
+    def print_stats(self):
+        s = self.saved()
+        print(f"\nNetwork policy: {s['requests']} requests saved (~{s['est_bytes'] / 1024:.0f} KB est.), "
+              f"{s['allowed']} let through")
+        for kind, c in sorted(self.stats.items()):
+            print(f"- {kind:8s} blocked={c['blocked']:3d}")
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# Warm automation daemon: one long-lived CDP session, job queue, watch folder
+#
+#   python offer-daemon.py serve                      # start (watches data/ too)
+#   python offer-daemon.py submit data/alice.xlsx [--url https://ats/.../offer]
+#   python offer-daemon.py status [JOB_ID]
+#   python offer-daemon.py cancel JOB_ID
+#
+# Jobs without a url run on the active tab, exactly like mr-offer.py. A file
+# dropped into data/ becomes a job; put the prospect url in a sidecar
+# <name>.url file next to it to have it opened in its own tab instead.
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from playwright.async_api import async_playwright
+
+from audit_capture import AUDIT
+from handle_scope import format_memory
+from preflight import validate_offers
+from script_loader import HERE, load_script, set_region
+
+HOST = "127.0.0.1"
+PORT = 8765
+WATCH_DIR = HERE / "data"
+WATCH_SUFFIXES = {".xlsx", ".csv", ".json"}
+CDP_URL = "http://127.0.0.1:9222"
+
+
+def is_manifest(path: Path) -> bool:
+    """A batch-offers manifest (excel,url rows) rather than an offer workbook"""
+    try:
+        if path.suffix.lower() == ".json":
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return isinstance(data, list) and bool(data) and isinstance(data[0], dict) and "excel" in data[0]
+        if path.suffix.lower() == ".csv":
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                header = {h.strip().lower() for h in next(csv.reader(f), [])}
+            return {"excel", "url"} <= header
+    except (OSError, ValueError):
+        pass  # unreadable / half-written: preflight reports it like any other file
+    return False
+
+
+class Daemon:
+    def __init__(self, args):
+        self.args = args
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=args.max_queue)
+        self.jobs: Dict[str, Dict] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.ids = itertools.count(1)
+        self.seen: Dict[str, float] = {}  # watched file -> mtime already queued
+        self.pw = None
+        self.browser = None
+
+    # ---------- queue ----------
+    def submit(self, excel: str, url: Optional[str] = None, source: str = "client") -> Dict:
+        job_id = f"j{next(self.ids)}"
+        job = {"id": job_id, "excel": str(excel), "url": url, "source": source,
+               "status": "queued", "submitted": time.time()}
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return {"error": f"queue full ({self.queue.maxsize} waiting), try again later"}
+        self.jobs[job_id] = job
+        return {"id": job_id, "status": "queued", "position": self.queue.qsize()}
+
+    def cancel(self, job_id: str) -> Dict:
+        job = self.jobs.get(job_id)
+        if not job:
+            return {"error": f"no job {job_id}"}
+        if job["status"] == "queued":
+            job["status"] = "cancelled"  # the worker skips it when it comes up
+        elif job["status"] == "running" and job_id in self.tasks:
+            self.tasks[job_id].cancel()
+        else:
+            return {"error": f"job {job_id} already {job['status']}"}
+        return {"id": job_id, "status": "cancelling" if job["status"] == "running" else job["status"]}
+
+    def status(self, job_id: Optional[str] = None) -> Dict:
+        if job_id:
+            return self.jobs.get(job_id) or {"error": f"no job {job_id}"}
+        return {"queued": self.queue.qsize(), "audit_queue": AUDIT.depth, "audit": AUDIT.stats,
+                "jobs": list(self.jobs.values())[-50:],
+                "connected": bool(self.browser and self.browser.is_connected())}
+
+    # ---------- browser ----------
+    async def ensure_browser(self):
+        if self.browser is None or not self.browser.is_connected():
+            self.browser = await self.pw.chromium.connect_over_cdp(self.args.cdp)
+        return self.browser
+
+    async def run_job(self, mod, fill_mode: str, job: Dict) -> Dict:
+        checked = (await asyncio.to_thread(validate_offers, [job["excel"]], self.args.region))[0]
+        if not checked["ok"]:
+            return {"ok": False, "error": "pre-flight: " + "; ".join(checked["errors"])}
+
+        browser = await self.ensure_browser()
+        ctx = browser.contexts[0]
+        if job["url"]:
+            page = await ctx.new_page()
+            await page.goto(job["url"], wait_until="domcontentloaded")
+            await mod.READY.form_settled(page, quiet_ms=200)
+        else:
+            # Same tab as the last job: let its audit screenshot finish before the form changes
+            await AUDIT.flush()
+            page = ctx.pages[-1]
+            await page.bring_to_front()
+
+        # Caches (_ID_CACHE, selector/plan files, parsed workbooks) stay warm
+        # between jobs; per-run records and plan overrides don't
+        set_region(mod, self.args.region)
+        mod.FILL_MODE = fill_mode
+        mod.READY.records.clear()
+        mod.TRACE.spans.clear()
+        result = await mod.run_offer(page, job["excel"])
+        mod.TRACE.write()
+        ok = result.get("verify", {}).get("ok", bool(result.get("filled")))
+        return dict(result, ok=ok)
+
+    async def worker(self, n: int):
+        mod = load_script(self.args.script)
+        fill_mode = mod.FILL_MODE  # run_plan overrides it (and the region's bindings / target) per template
+        while True:
+            job = await self.queue.get()
+            try:
+                if job["status"] == "cancelled":
+                    continue
+                job.update(status="running", started=time.time(), worker=n)
+                task = asyncio.create_task(self.run_job(mod, fill_mode, job))
+                self.tasks[job["id"]] = task
+                await asyncio.wait({task})
+                if task.cancelled():
+                    job["status"] = "cancelled"
+                elif task.exception():
+                    job.update(status="failed", error=str(task.exception()))
+                else:
+                    res = task.result()
+                    job.update(status="done" if res.get("ok") else "failed", result=res,
+                               error=res.get("error"))
+                job["finished"] = time.time()
+                job["seconds"] = round(job["finished"] - job["started"], 2)
+                mem = (job.get("result") or {}).get("memory")
+                print(f"[{job['id']}] {job['excel']}: {job['status']} ({job['seconds']}s)"
+                      + (f" - {format_memory(mem)}" if mem else ""))
+            finally:
+                self.tasks.pop(job["id"], None)
+                self.queue.task_done()
+
+    # ---------- inputs ----------
+    async def watch(self):
+        """Queue new or changed files in data/ once their size stops changing"""
+        sizes: Dict[str, int] = {}
+        while True:
+            if WATCH_DIR.is_dir():
+                for f in WATCH_DIR.iterdir():
+                    if f.suffix.lower() not in WATCH_SUFFIXES or f.name.startswith(("~$", ".")):
+                        continue
+                    try:
+                        key, st = str(f), f.stat()
+                        if self.seen.get(key) == st.st_mtime:
+                            continue
+                        if sizes.get(key) != st.st_size:
+                            sizes[key] = st.st_size  # still being written, look again next round
+                            continue
+                        if is_manifest(f):
+                            self.seen[key] = st.st_mtime
+                            print(f"Watch: {f.name} is a batch manifest, not an offer - skipped")
+                            continue
+                        side = f.with_suffix(".url")
+                        url = side.read_text(encoding="utf-8").strip() if side.exists() else None
+                    except OSError as e:  # deleted / renamed since iterdir(): gone by the next round
+                        sizes.pop(str(f), None)
+                        print(f"Watch: skipped {f.name}: {e}")
+                        continue
+                    res = self.submit(key, url, source="watch")
+                    if "error" not in res:  # queue full: leave it for the next round
+                        self.seen[key] = st.st_mtime
+                        print(f"Watch: queued {f.name} as {res['id']}")
+            await asyncio.sleep(self.args.poll)
+
+    async def handle(self, reader, writer):
+        try:
+            line = await reader.readline()
+            req = json.loads(line or b"{}")
+            cmd = req.get("cmd")
+            if cmd == "submit":
+                res = self.submit(req["excel"], req.get("url"))
+            elif cmd == "cancel":
+                res = self.cancel(req["id"])
+            elif cmd == "status":
+                res = self.status(req.get("id"))
+            else:
+                res = {"error": f"unknown command {cmd!r}"}
+        except (ValueError, KeyError) as e:
+            res = {"error": f"bad request: {e}"}
+        writer.write((json.dumps(res, default=str) + "\n").encode())
+        await writer.drain()
+        writer.close()
+
+    async def serve(self):
+        async with async_playwright() as p:
+            self.pw = p
+            await self.ensure_browser()
+            server = await asyncio.start_server(self.handle, HOST, self.args.port)
+            print(f"Offer daemon on {HOST}:{self.args.port}, watching {WATCH_DIR}, "
+                  f"{self.args.workers} worker(s), queue limit {self.args.max_queue}")
+            background = [asyncio.create_task(self.worker(n)) for n in range(1, self.args.workers + 1)]
+            if not self.args.no_watch:
+                background.append(asyncio.create_task(self.watch()))
+            async with server:
+                await server.serve_forever()
+
+
+async def request(port: int, payload: Dict) -> Dict:
+    reader, writer = await asyncio.open_connection(HOST, port)
+    writer.write((json.dumps(payload) + "\n").encode())
+    await writer.drain()
+    res = json.loads(await reader.readline())
+    writer.close()
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Warm offer automation daemon and client")
+    ap.add_argument("--port", type=int, default=PORT)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    s = sub.add_parser("serve")
+    s.add_argument("--cdp", default=CDP_URL)
+    s.add_argument("--script", default="mr-offer.py")
+    s.add_argument("--region", default="IND")
+    s.add_argument("--workers", type=int, default=1, help="jobs at once (each needs its own url/tab)")
+    s.add_argument("--max-queue", type=int, default=20, help="submissions beyond this are refused")
+    s.add_argument("--poll", type=float, default=1.0, help="watch folder poll interval (s)")
+    s.add_argument("--no-watch", action="store_true")
+
+    s = sub.add_parser("submit")
+    s.add_argument("excel")
+    s.add_argument("--url")
+    s = sub.add_parser("status")
+    s.add_argument("id", nargs="?")
+    s = sub.add_parser("cancel")
+    s.add_argument("id")
+    args = ap.parse_args()
+
+    if args.cmd == "serve":
+        asyncio.run(Daemon(args).serve())
+        return
+    if args.cmd == "submit":
+        payload = {"cmd": "submit", "excel": str(Path(args.excel).resolve()), "url": args.url}
+    else:
+        payload = {"cmd": args.cmd, "id": args.id}
+    print(json.dumps(asyncio.run(request(args.port, payload)), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
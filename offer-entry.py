@@ -2,33 +2,30 @@
 # Field filler: read Excel and type into specific fields (IMPROVED FOR SPEED)
 
 import asyncio
+import time
 from typing import Dict, Optional, Set
+from urllib.parse import urlsplit
 from playwright.async_api import async_playwright
-import openpyxl
+
+from fill_plans import region_bindings
+from input_map import InputMap
+from readiness import Readiness
+from run_history import record_run
+from selector_cache import SelectorCache
+from tracing import Tracer
+from value_injection import inject_all
+from verify import diff, snapshot, write_report
+from workbook_reader import read_values
 
 CDP_URL = "http://127.0.0.1:9222"
+REGION = "IND"  # regions.json: bindings per regional template
 EXCEL_FILE_PATH = r"/path/to/your/excel-file.xlsx"
+FILL_MODE = "keyboard"  # "keyboard" = type every digit, "inject" = set all values in one call
+VERIFY = True  # read every amount back after the run and retype mismatches
+HISTORY = True  # record timings / success per run in runs.sqlite (python run_history.py report)
 
-# Map page label → Excel cell (extend as needed)
-BINDINGS = [
-    {"label_text": "Annual Salary", "excel_cell": "E21", "container_id": None},
-    {"label_text": "Pay Based on Frequency", "excel_cell": "D6", "container_id": None},
-    {"label_text": "Basic Pay (Annual)", "excel_cell": "E6", "container_id": None},
-    {"label_text": "House Rent Allowance (Monthly)", "excel_cell": "D7", "container_id": None},
-    {"label_text": "House Rent Allowance (annual)", "excel_cell": "E7", "container_id": None},
-    {"label_text": "General Allowance (Monthly)", "excel_cell": "D8", "container_id": None},
-    {"label_text": "General Allowance (annual)", "excel_cell": "E8", "container_id": None},
-    {"label_text": "Cash Salary (Monthly) Section", "excel_cell": "D10", "container_id": None},
-    {"label_text": "Cash Salary (Annual) Section", "excel_cell": "E10", "container_id": None},
-    {"label_text": "Employer PF Contribution (Monthly)", "excel_cell": "D13", "container_id": None},
-    {"label_text": "Employer PF Contribution (annual)", "excel_cell": "E13", "container_id": None},
-    {"label_text": "Total Base Salary (Monthly)", "excel_cell": "D16", "container_id": None},
-    {"label_text": "Total Base Salary (Annual)", "excel_cell": "E16", "container_id": None},
-    {"label_text": "Monthly Bonus", "excel_cell": "D19", "container_id": None},
-    {"label_text": "Annual Bonus", "excel_cell": "E19", "container_id": None},
-    {"label_text": "Total Cash Compensation (Monthly)", "excel_cell": "D21", "container_id": None},
-    {"label_text": "Total Cash Compensation (Annual)", "excel_cell": "E21", "container_id": None},
-]
+# Map page label → Excel cell (per region - extend in regions.json)
+BINDINGS = region_bindings(REGION)
 
 # ---------- Excel helpers (OPTIMIZED) ----------
 def _fmt_num(v) -> str:
@@ -45,26 +42,25 @@ def _fmt_num(v) -> str:
 
 def read_cells_once(path: str, cells: Set[str]) -> Dict[str, str]:
     """Read all needed cells in one operation"""
-    wb = openpyxl.load_workbook(path, data_only=True, read_only=True)
-    sh = wb[wb.sheetnames[0]]
-    out: Dict[str, str] = {}
-    for addr in cells:
-        try:
-            out[addr] = _fmt_num(sh[addr].value)
-        except Exception:
-            out[addr] = ""
-    wb.close()
-    return out
+    # One streaming pass over just the needed rows; unchanged files come from cache.
+    # Also takes CSV / JSON exports of the sheet.
+    raw = read_values(path, cells)
+    return {addr: _fmt_num(raw.get(addr)) for addr in cells}
 
 # ---------- Targeting helpers (SPEED OPTIMIZED) ----------
+READY = Readiness()
+TRACE = Tracer("offer-entry")  # per-field phase timings -> traces/*.jsonl
 _ID_CACHE: Dict[str, str] = {}  # Cache learned IDs for instant reuse
+SELECTORS = SelectorCache()  # ...and keep them on disk per offer template
 
 async def get_block(page, label_text: str, container_id: Optional[str]):
     # Try cached ID first (FASTEST)
     cached = _ID_CACHE.get(label_text)
     if cached:
         blk = page.locator(f"#{cached}")
-        if await blk.count():
+        # Ids confirmed against the page by SELECTORS.warm() skip the count()
+        if label_text in SELECTORS.validated or await blk.count():
+            SELECTORS.hit()
             return blk.first
 
     # Try explicit ID if provided
@@ -74,6 +70,7 @@ async def get_block(page, label_text: str, container_id: Optional[str]):
             return blk.first
 
     # Fallback: find by text content
+    SELECTORS.miss()
     blk = page.locator('[id^="spl-form-element_"]').filter(
         has=page.get_by_text(label_text, exact=False)
     ).first
@@ -106,84 +103,86 @@ async def type_into_focused(page, value: str) -> bool:
     except:
         return False
 
-async def pick_amount_input_near_currency(block):
-    try:
-        # Ultra-fast candidate search - only check first match
-        currency = block.locator('[role="combobox"], button[aria-expanded], button').first
-        cbox = await currency.bounding_box()
-        if not cbox:
-            return None
-            
-        cur_right = cbox["x"] + cbox["width"]
-        cur_mid_y = cbox["y"] + cbox["height"] / 2
-
-        # Only check the most likely input type for speed
-        inputs = block.locator('input, [role="textbox"]')
-        n = await inputs.count()
-        
-        # Return first reasonable match instead of finding "best" match
-        for i in range(min(n, 2)):  # Only check first 2
-            el = inputs.nth(i)
-            try:
-                b = await el.bounding_box()
-                if b and b["width"] >= 50:
-                    cx = b["x"] + b["width"] / 2
-                    cy = b["y"] + b["height"] / 2
-                    dx = cx - cur_right
-                    if dx > 0 and abs(cy - cur_mid_y) <= 60:
-                        return el  # Return first match, don't optimize further
-            except:
-                continue
-        return None
-    except:
-        return None
+INPUTS = InputMap()  # amount input paired with each currency combobox, one snapshot for all
+
+async def pair_inputs(page):
+    items = [{"label": b["label_text"], "id": _ID_CACHE.get(b["label_text"]) or b.get("container_id")}
+             for b in BINDINGS]
+    with TRACE.span("*", "pair_inputs"):
+        n = await INPUTS.snapshot(page, items)
+    print(f"Paired {n}/{len(BINDINGS)} amount inputs with their currency boxes")
 
 async def fill_field(page, label_text: str, excel_value: str, container_id: Optional[str] = None) -> bool:
     if not excel_value:
         return False
 
     try:
-        block = await get_block(page, label_text, container_id)
-        if not await block.count():
+        with TRACE.span(label_text, "locate") as sp:
+            block = await get_block(page, label_text, container_id)
+            sp.ok = bool(await block.count())
+        if not sp.ok:
             return False
 
         # Method 1: Tab navigation (FASTEST) - try this first always
-        if await focus_value_box_via_tab(page, block) and await type_into_focused(page, excel_value):
-            return True
-
-        # Method 2: Skip complex input detection, try direct click fallback immediately
-        bb = await block.bounding_box()
-        if bb:
-            # Try multiple click positions quickly
-            positions = [
-                (bb["x"] + bb["width"] - 14, bb["y"] + bb["height"] / 2),
-                (bb["x"] + bb["width"] - 50, bb["y"] + bb["height"] / 2),
-                (bb["x"] + bb["width"] - 100, bb["y"] + bb["height"] / 2)
-            ]
-            
-            for x, y in positions:
-                try:
-                    await page.mouse.click(x, y)
-                    if await type_into_focused(page, excel_value):
-                        return True
-                except:
-                    continue
+        with TRACE.span(label_text, "focus") as sp:
+            sp.ok = await focus_value_box_via_tab(page, block)
+        if sp.ok:
+            with TRACE.span(label_text, "type") as sp:
+                sp.ok = await type_into_focused(page, excel_value)
+            if sp.ok:
+                return True
+
+        # Method 2: One click straight into the paired amount input
+        with TRACE.span(label_text, "fallback") as sp:
+            sp.ok = False
+            box = INPUTS.locator(page, label_text)
+            if box is None:
+                await pair_inputs(page)  # block appeared / re-rendered since the snapshot
+                box = INPUTS.locator(page, label_text)
+            if box is not None:
+                sp.retries += 1
+                await box.click(timeout=1000)
+                if await type_into_focused(page, excel_value):
+                    sp.ok = True
+                    return True
 
     except:
         pass
         
     return False
 
+async def verify_and_retry(page, expected: Dict[str, str]) -> Dict:
+    """One read-back of every amount; retype only the ones that differ"""
+    before = diff(await snapshot(page, BINDINGS, _ID_CACHE), BINDINGS, expected)
+    by_label = {b["label_text"]: b for b in BINDINGS}
+    retried = []
+    for d in before:
+        ok = False
+        if d["field"] == "amount":
+            ok = await fill_field(page, d["label"], expected[d["cell"]], by_label[d["label"]].get("container_id"))
+        retried.append(dict(d, retry_ok=ok))
+    after = diff(await snapshot(page, BINDINGS, _ID_CACHE), BINDINGS, expected) if retried else before
+    report = {"checked": len(BINDINGS), "mismatched_before": before, "retried": retried,
+              "mismatched_after": after, "ok": not after}
+    path = write_report(report, "offer-entry")
+    print(f"Verify: {len(before)} mismatches, {len(retried)} retried, {len(after)} left -> {path}")
+    return report
+
 # ---------- Main (MAXIMUM SPEED) ----------
 async def main():
     async with async_playwright() as p:
         browser = await p.chromium.connect_over_cdp(CDP_URL)
         page = browser.contexts[0].pages[-1]
+        TRACE.bind(page)
+        started = time.perf_counter()
 
         print("Reading Excel data...")
         # Read all cells at once
         needed = {b["excel_cell"] for b in BINDINGS}
         excel_values = read_cells_once(EXCEL_FILE_PATH, needed)
+        await SELECTORS.warm(page, _ID_CACHE)
+        await pair_inputs(page)
+        injected = await inject_all(page, BINDINGS, excel_values, _ID_CACHE, TRACE) if FILL_MODE == "inject" else {}
 
         print("Filling fields at maximum speed...")
         filled = 0
@@ -193,19 +192,33 @@ async def main():
             if v:
                 print(f"[{i+1:2d}] {b['label_text']}: {v}", end=" ")
                 
+                if injected.get(b["label_text"], {}).get("ok"):
+                    filled += 1
+                    print("✅ (inject)")
+                    continue
                 ok = await fill_field(page, b["label_text"], v, b.get("container_id"))
                 if ok:
                     filled += 1
                     print("✅")
+                    # Wait only until the field actually holds the value
+                    with TRACE.span(b["label_text"], "settle"):
+                        await READY.value_committed(page, v)
                 else:
                     print("✗")
-                
-                # Ultra-minimal delay - just enough to prevent conflicts
-                await page.wait_for_timeout(25)  # Down to 25ms
             else:
                 print(f"[{i+1:2d}] {b['label_text']}: (empty)")
 
         print(f"Finished: {filled}/{len(BINDINGS)} filled")
+        report = await verify_and_retry(page, excel_values) if VERIFY else None
+        if HISTORY:
+            record_run(TRACE.spans, TRACE.name, host=urlsplit(page.url).netloc, template=SELECTORS.key,
+                       region=REGION, wall_ms=(time.perf_counter() - started) * 1000, filled=filled,
+                       total=len(BINDINGS), verified=report["ok"] if report else None,
+                       mismatches=len(report["mismatched_after"]) if report else 0)
+        SELECTORS.save(_ID_CACHE)
+        SELECTORS.print_stats()
+        READY.print_summary()
+        TRACE.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
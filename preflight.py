@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# Pre-flight validation: check offer workbooks before any browser work
+#
+#   python preflight.py data/*.xlsx
+#
+# Every workbook in the batch becomes one row of a (offers x cells) matrix and
+# each rule runs once over the whole matrix. numpy is used when installed;
+# the plain-Python path gives the same answers, just slower on big batches.
+
+import math
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional - only speeds up large batches
+    np = None
+
+from fill_plans import REGIONS, region_bindings
+from workbook_reader import read_values
+
+POOL_THRESHOLD = 16  # below this many workbooks a process pool costs more than it saves
+CHUNK = 32
+
+_ADDR = re.compile(r"^([A-Z]+)(\d+)$")
+
+
+def _num(v) -> float:
+    """Cell value -> float; blank -> NaN; text that isn't a number -> -inf marker"""
+    if v is None or (isinstance(v, str) and not v.strip()):
+        return math.nan
+    if isinstance(v, bool):
+        return -math.inf
+    if isinstance(v, (int, float)):
+        return float(v)
+    try:
+        return float(str(v).strip().replace(",", ""))
+    except ValueError:
+        return -math.inf
+
+
+def build_rules(bindings: List[Dict], checks: Optional[Dict] = None) -> Dict:
+    """Turn the BINDINGS cell map into concrete rules"""
+    checks = checks or {}
+    cells = sorted({b["excel_cell"] for b in bindings})
+    labels = {b["excel_cell"]: b["label_text"] for b in bindings}
+    monthly_col = checks.get("monthly_col", "D")
+    annual_col = checks.get("annual_col", "E")
+    by_row: Dict[str, Dict[str, str]] = {}
+    for c in cells:
+        col, row = _ADDR.match(c).groups()
+        by_row.setdefault(row, {})[col] = c
+    # Only the listed pairs must be exact (a one-off bonus or a totals row isn't 12 x
+    # its monthly); other rows with both columns are checked too, but only flagged
+    strict = [tuple(p) for p in checks.get("pairs", []) if all(c in cells for c in p)]
+    same_row = [(r[monthly_col], r[annual_col]) for r in by_row.values() if monthly_col in r and annual_col in r]
+    optional = set(checks.get("optional", []))
+    return {
+        "cells": cells,
+        "labels": labels,
+        "required": [c for c in cells if c not in optional],
+        "pairs": strict,
+        "soft_pairs": [p for p in same_row if p not in strict],
+        "months": checks.get("months", 12),
+        "totals": {t: parts for t, parts in checks.get("totals", {}).items()
+                   if t in cells and all(p in cells for p in parts)},
+        "tolerance": checks.get("tolerance", 1.0),
+    }
+
+
+def _check_matrix(m, rules: Dict) -> List[Dict]:
+    """m: offers x cells matrix (list of lists or ndarray) -> per-offer errors / warnings"""
+    col = {c: i for i, c in enumerate(rules["cells"])}
+    n = len(m)
+    errors: List[List[str]] = [[] for _ in range(n)]
+    warnings: List[List[str]] = [[] for _ in range(n)]
+    tol, months, labels = rules["tolerance"], rules["months"], rules["labels"]
+
+    if np is not None:
+        a = np.asarray(m, dtype=float).reshape(n, len(col))
+        bad_text = np.isneginf(a)
+        blank = np.isnan(a)
+        for c in rules["required"]:
+            for i in np.nonzero(blank[:, col[c]])[0]:
+                errors[i].append(f"{c} ({labels[c]}) is blank")
+        for c in rules["cells"]:
+            for i in np.nonzero(bad_text[:, col[c]])[0]:
+                errors[i].append(f"{c} ({labels[c]}) is not a number")
+        clean = np.where(bad_text, np.nan, a)
+        for pairs, out in ((rules["pairs"], errors), (rules["soft_pairs"], warnings)):
+            for mc, ac in pairs:
+                mon, ann = clean[:, col[mc]], clean[:, col[ac]]
+                diff = np.abs(ann - months * mon)
+                limit = np.maximum(tol * months, np.abs(ann) * 1e-4)
+                for i in np.nonzero(diff > limit)[0]:
+                    out[i].append(f"{ac} ({ann[i]:.0f}) != {months} x {mc} ({mon[i]:.0f})")
+        for total, parts in rules["totals"].items():
+            want = np.nansum(clean[:, [col[p] for p in parts]], axis=1)
+            got = clean[:, col[total]]
+            for i in np.nonzero(np.abs(got - want) > tol * len(parts))[0]:
+                warnings[i].append(f"{total} ({got[i]:.0f}) != {' + '.join(parts)} ({want[i]:.0f})")
+    else:
+        for i, row in enumerate(m):
+            v = {c: row[j] for c, j in col.items()}
+            for c in rules["required"]:
+                if math.isnan(v[c]):
+                    errors[i].append(f"{c} ({labels[c]}) is blank")
+            for c in rules["cells"]:
+                if v[c] == -math.inf:
+                    errors[i].append(f"{c} ({labels[c]}) is not a number")
+            clean = {c: (math.nan if x == -math.inf else x) for c, x in v.items()}
+            for pairs, out in ((rules["pairs"], errors), (rules["soft_pairs"], warnings)):
+                for mc, ac in pairs:
+                    mon, ann = clean[mc], clean[ac]
+                    if abs(ann - months * mon) > max(tol * months, abs(ann) * 1e-4):
+                        out[i].append(f"{ac} ({ann:.0f}) != {months} x {mc} ({mon:.0f})")
+            for total, parts in rules["totals"].items():
+                want = sum(clean[p] for p in parts if not math.isnan(clean[p]))
+                if abs(clean[total] - want) > tol * len(parts):
+                    warnings[i].append(f"{total} ({clean[total]:.0f}) != {' + '.join(parts)} ({want:.0f})")
+
+    return [{"errors": e, "warnings": w} for e, w in zip(errors, warnings)]
+
+
+def _validate_chunk(paths: Sequence[str], rules: Dict) -> List[Dict]:
+    rows, results = [], []
+    for p in paths:
+        try:
+            raw = read_values(p, rules["cells"])
+            rows.append([_num(raw.get(c)) for c in rules["cells"]])
+            results.append({"path": p})
+        except Exception as e:
+            results.append({"path": p, "unreadable": f"{type(e).__name__}: {e}"})
+    checked = iter(_check_matrix(rows, rules)) if rows else iter(())
+    for r in results:
+        if "unreadable" in r:
+            r.update(errors=[f"cannot read workbook: {r.pop('unreadable')}"], warnings=[])
+        else:
+            r.update(next(checked))
+        r["ok"] = not r["errors"]
+    return results
+
+
+def validate_offers(paths: Sequence[str], region: str = "IND", bindings: Optional[List[Dict]] = None,
+                    workers: Optional[int] = None) -> List[Dict]:
+    """[{"path", "ok", "errors", "warnings"}] in input order; errors reject, warnings only flag"""
+    rules = build_rules(bindings or region_bindings(region), REGIONS.get(region, {}).get("checks"))
+    paths = list(paths)
+    if len(paths) < POOL_THRESHOLD:
+        return _validate_chunk(paths, rules)
+    chunks = [paths[i:i + CHUNK] for i in range(0, len(paths), CHUNK)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = pool.map(_validate_chunk, chunks, [rules] * len(chunks))
+        return [r for part in parts for r in part]
+
+
+def print_report(results: List[Dict]):
+    for r in results:
+        mark = "✅" if r["ok"] and not r["warnings"] else ("⚠️" if r["ok"] else "✗")
+        print(f"{mark} {r['path']}")
+        for e in r["errors"]:
+            print(f"    ✗ {e}")
+        for w in r["warnings"]:
+            print(f"    ⚠️ {w}")
+    bad = sum(1 for r in results if not r["ok"])
+    print(f"Pre-flight: {len(results) - bad}/{len(results)} offers OK, {bad} rejected")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python preflight.py WORKBOOK [WORKBOOK ...]")
+        sys.exit(2)
+    res = validate_offers(sys.argv[1:])
+    print_report(res)
+    sys.exit(0 if all(r["ok"] for r in res) else 1)
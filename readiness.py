@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# Readiness waits: wait for the real UI condition (capped) instead of fixed sleeps
+
+import time
+from typing import Dict, List
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from handle_scope import release_soon  # wait_for_function returns a JSHandle per wait
+from value_injection import FORM_ROOT_JS
+
+# Default caps (ms). A wait that hits its cap is recorded and the caller carries
+# on, which is exactly what the old fixed sleeps did - just without the guesswork.
+DEFAULT_CAPS = {
+    "listbox_open": 1500,
+    "option_rendered": 1500,
+    "options_listed": 1500,
+    "option_highlighted": 500,
+    "committed": 1500,
+    "form_settled": 2000,
+    "value_committed": 500,
+}
+
+# Shared dropdown probe: reports whether a listbox is open, whether the target
+# option is rendered at the top of the filtered list and whether it's highlighted.
+_DROPDOWN_STATE_JS = """
+({ target, want }) => {
+  const visible = (el) => { const r = el.getBoundingClientRect(); return r.width > 0 && r.height > 0; };
+  const lists = [...document.querySelectorAll('[role="listbox"]')].filter(visible);
+  const expanded = [...document.querySelectorAll('[aria-expanded="true"]')].filter(visible);
+  // aria-expanded flips before the list renders, so on its own it only counts
+  // once focus has moved into the (filter) input the dropdown renders
+  const typing = document.activeElement && /^(INPUT|TEXTAREA)$/.test(document.activeElement.tagName);
+  const open = lists.length > 0 || (expanded.length > 0 && typing);
+  if (want === 'open') return open;
+  if (want === 'closed') return lists.length === 0;
+
+  const scope = lists.length ? lists : [document];
+  const options = scope.flatMap(l => [...l.querySelectorAll('[role="option"], li')]).filter(visible);
+  const hit = (el) => (el.textContent || '').toUpperCase().includes(target);
+  if (want === 'rendered') return options.length > 0 && options.some(hit);
+  if (want === 'listed') return lists.length > 0 && options.length > 0;
+
+  const activeId = expanded.map(e => e.getAttribute('aria-activedescendant')).find(Boolean);
+  return options.some(o => hit(o) && (
+    o.getAttribute('aria-selected') === 'true' ||
+    (activeId && o.id === activeId) ||
+    /highlight|active|focus/i.test(o.className || '')
+  ));
+}
+"""
+
+# Resolves once the form (or `root`) has been quiet for quietMs (or capMs passed).
+# Dropdown churn doesn't count; a form container replaced mid-wait does.
+_SETTLE_JS = """
+({ root, quietMs, capMs }) => new Promise((resolve) => {
+""" + FORM_ROOT_JS + """
+  const start = performance.now();
+  let last = start;
+  const pick = () => (root && document.querySelector(root)) || formRoot();
+  const nodes = (m) => [...m.addedNodes, ...m.removedNodes];
+  const churn = (m) => inListbox(m) || (m.type === 'childList' && nodes(m).some(isListbox) &&
+                                        nodes(m).every((n) => n.nodeType !== 1 || isListbox(n)));
+  const obs = new MutationObserver((muts) => { if (!muts.every(churn)) last = performance.now(); });
+  let target = pick();
+  obs.observe(target, { subtree: true, childList: true, attributes: true, characterData: true });
+  const tick = () => {
+    const now = performance.now();
+    if (!target.isConnected) {
+      obs.disconnect();
+      target = pick();
+      obs.observe(target, { subtree: true, childList: true, attributes: true, characterData: true });
+      last = now;
+    }
+    const quiet = now - last >= quietMs;
+    if (quiet || now - start >= capMs) { obs.disconnect(); resolve(quiet); }
+    else setTimeout(tick, Math.min(quietMs, 16));
+  };
+  setTimeout(tick, quietMs);
+})
+"""
+
+# Focused input holds the digits we typed (ATS may add separators on its own).
+_VALUE_JS = """
+(value) => {
+  const el = document.activeElement;
+  if (!el) return false;
+  const v = ('value' in el ? el.value : el.textContent) || '';
+  return v.replace(/[^0-9.-]/g, '').replace(/\\.0+$/, '') === value;
+}
+"""
+
+
+class Readiness:
+    """Capped event-driven waits that record how long each one really took"""
+
+    def __init__(self, caps: Dict[str, int] = None, polling="raf"):
+        self.caps = dict(DEFAULT_CAPS, **(caps or {}))
+        # "raf" is the tightest loop for the foreground tab; background tabs
+        # (batch mode) don't get animation frames, so they poll on an interval
+        self.polling = polling
+        self.records: List[Dict] = []
+
+    def _record(self, name: str, started: float, ok: bool) -> bool:
+        self.records.append({"wait": name, "ms": (time.perf_counter() - started) * 1000, "ok": ok})
+        return ok
+
+    async def _poll(self, page, name: str, want: str, target: str = "") -> bool:
+        started = time.perf_counter()
+        try:
+            release_soon(page, await page.wait_for_function(
+                _DROPDOWN_STATE_JS, arg={"target": target.upper(), "want": want},
+                timeout=self.caps[name], polling=self.polling,
+            ))
+            return self._record(name, started, True)
+        except PlaywrightTimeoutError:
+            return self._record(name, started, False)
+
+    async def listbox_open(self, page) -> bool:
+        return await self._poll(page, "listbox_open", "open")
+
+    async def option_rendered(self, page, target: str) -> bool:
+        return await self._poll(page, "option_rendered", "rendered", target)
+
+    async def options_listed(self, page) -> bool:
+        """The open listbox has rendered its (unfiltered) options"""
+        return await self._poll(page, "options_listed", "listed")
+
+    async def option_highlighted(self, page, target: str) -> bool:
+        return await self._poll(page, "option_highlighted", "highlighted", target)
+
+    async def committed(self, page, element, target: str) -> bool:
+        """Listbox closed and the field now shows the target text"""
+        started = time.perf_counter()
+        cap = self.caps["committed"]
+        try:
+            release_soon(page, await page.wait_for_function(
+                _DROPDOWN_STATE_JS, arg={"target": "", "want": "closed"}, timeout=cap, polling=self.polling
+            ))
+            left = max(1, cap - (time.perf_counter() - started) * 1000)
+            await element.filter(has_text=target).first.wait_for(state="attached", timeout=left)
+            return self._record("committed", started, True)
+        except PlaywrightTimeoutError:
+            return self._record("committed", started, False)
+
+    async def form_settled(self, page, quiet_ms: int = 60, root: str = None) -> bool:
+        """No DOM mutations in the form for quiet_ms - i.e. the ATS finished re-rendering"""
+        started = time.perf_counter()
+        try:
+            ok = await page.evaluate(
+                _SETTLE_JS, {"root": root, "quietMs": quiet_ms, "capMs": self.caps["form_settled"]}
+            )
+        except Exception:
+            ok = False
+        return self._record("form_settled", started, bool(ok))
+
+    async def value_committed(self, page, value: str) -> bool:
+        started = time.perf_counter()
+        try:
+            release_soon(page, await page.wait_for_function(
+                _VALUE_JS, arg=value, timeout=self.caps["value_committed"], polling=self.polling
+            ))
+            return self._record("value_committed", started, True)
+        except PlaywrightTimeoutError:
+            return self._record("value_committed", started, False)
+
+    def summary(self) -> Dict[str, Dict]:
+        out: Dict[str, Dict] = {}
+        for r in self.records:
+            s = out.setdefault(r["wait"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "capped": 0})
+            s["count"] += 1
+            s["total_ms"] += r["ms"]
+            s["max_ms"] = max(s["max_ms"], r["ms"])
+            s["capped"] += 0 if r["ok"] else 1
+        for s in out.values():
+            s["avg_ms"] = s["total_ms"] / s["count"]
+        return out
+
+    def print_summary(self):
+        print("\nWaits (actual time spent):")
+        for name, s in self.summary().items():
+            print(f"- {name:18s} n={s['count']:3d} avg={s['avg_ms']:7.1f}ms "
+                  f"max={s['max_ms']:7.1f}ms capped={s['capped']}")
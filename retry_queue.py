@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Deferred retries: failed fields wait here until the main pass is done, then get
+# retried with a backoff that depends on how they failed
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+# failure class -> (first delay ms, multiplier, max attempts)
+BACKOFF = {
+    "not_found": (250, 2.0, 2),  # block not rendered (yet)
+    "dropdown": (100, 2.0, 3),   # listbox never opened
+    "option": (150, 2.0, 3),     # TARGET never showed up in the filtered list
+    "commit": (100, 1.5, 3),     # Enter didn't stick
+    "focus": (30, 1.0, 2),       # Tab didn't land in the box - retry clicks the paired input
+    "type": (50, 1.5, 2),
+    "error": (200, 2.0, 2),      # anything that raised
+}
+RETRY_BUDGET = 12  # retries per offer, all fields together
+
+Attempt = Callable[[int], Awaitable[Optional[str]]]  # attempt no. -> None on success, else failure class
+
+
+class RetryQueue:
+    """Per-offer queue of failed fields; drain() after the main pass"""
+
+    def __init__(self, budget: int = RETRY_BUDGET, backoff: Optional[Dict] = None):
+        self.budget = budget
+        self.backoff = dict(BACKOFF, **(backoff or {}))
+        self._seq = itertools.count()
+        self.reset()
+
+    def reset(self):
+        self.heap: List = []
+        self.used = 0
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _stat(self, cls: str) -> Dict[str, int]:
+        return self.stats.setdefault(cls, {"failed": 0, "attempts": 0, "recovered": 0, "gave_up": 0})
+
+    def _delay(self, cls: str, attempt: int) -> float:
+        base, mult, _ = self.backoff.get(cls, self.backoff["error"])
+        return base * mult ** (attempt - 1) / 1000
+
+    def defer(self, key: str, kind: str, cls: str, attempt: Attempt):
+        """Queue a failed field; `kind` is "currency" or "amount".
+
+        Currencies drain before amounts - switching one re-renders the amount box.
+        """
+        self._stat(cls)["failed"] += 1
+        item = {"key": key, "kind": kind, "cls": cls, "attempt": 1, "fn": attempt, "first": cls}
+        due = time.monotonic() + self._delay(cls, 1)
+        heapq.heappush(self.heap, (kind != "currency", due, next(self._seq), item))
+
+    def __len__(self):
+        return len(self.heap)
+
+    async def drain(self) -> Dict[str, Set[str]]:
+        """Retry until everything recovered, ran out of attempts or the budget is gone.
+
+        Returns the recovered keys per kind.
+        """
+        recovered: Dict[str, Set[str]] = {"currency": set(), "amount": set()}
+        while self.heap:
+            _, due, _, item = heapq.heappop(self.heap)
+            cls = item["cls"]
+            if self.used >= self.budget or item["attempt"] > self.backoff.get(cls, self.backoff["error"])[2]:
+                self._stat(item["first"])["gave_up"] += 1
+                print(f"Retry: giving up on {item['key']} ({cls})")
+                continue
+            wait = due - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.used += 1
+            self._stat(cls)["attempts"] += 1
+            try:
+                failed = await item["fn"](item["attempt"])
+            except Exception:
+                failed = "error"
+            if failed is None:
+                self._stat(item["first"])["recovered"] += 1
+                recovered[item["kind"]].add(item["key"])
+                continue
+            item["cls"] = failed
+            item["attempt"] += 1
+            due = time.monotonic() + self._delay(failed, item["attempt"])
+            heapq.heappush(self.heap, (item["kind"] != "currency", due, next(self._seq), item))
+        return recovered
+
+    def print_stats(self):
+        if not self.stats:
+            return
+        print(f"\nRetries ({self.used}/{self.budget} of budget used):")
+        for cls, s in self.stats.items():
+            print(f"- {cls:10s} failed={s['failed']:2d} attempts={s['attempts']:2d} "
+                  f"recovered={s['recovered']:2d} gave_up={s['gave_up']:2d}")
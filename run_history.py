@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# Run history in SQLite + regression report
+#
+#   python run_history.py report [--recent 10] [--baseline 50] [--script mr-offer]
+#
+# Every run stores its spans (field, phase, ms, ok) with template and host. The
+# report compares the most recent runs against the runs just before them and
+# flags phases that got significantly slower or started failing more often.
+
+import argparse
+import math
+import socket
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+DB_PATH = Path(__file__).resolve().parent / "runs.sqlite"
+ALPHA = 0.01       # significance level for both tests
+MIN_SLOWDOWN = 1.2  # ...and the median must be at least this much slower to matter
+MIN_SAMPLES = 8
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+  id INTEGER PRIMARY KEY, started REAL, script TEXT, host TEXT, machine TEXT, template TEXT,
+  region TEXT, wall_ms REAL, filled INTEGER, total INTEGER, verified INTEGER, mismatches INTEGER,
+  handles INTEGER, js_heap_mb REAL
+);
+CREATE TABLE IF NOT EXISTS spans (
+  run_id INTEGER REFERENCES runs(id), field TEXT, phase TEXT, ms REAL, ok INTEGER, retries INTEGER
+);
+CREATE INDEX IF NOT EXISTS spans_run ON spans(run_id);
+CREATE INDEX IF NOT EXISTS runs_script ON runs(script, started);
+"""
+
+
+_ADDED_COLUMNS = {"handles": "INTEGER", "js_heap_mb": "REAL"}
+
+
+def connect(path: Optional[Path] = None) -> sqlite3.Connection:
+    """None = DB_PATH as it is now (looked up per call, so callers can repoint it)"""
+    db = sqlite3.connect(str(path or DB_PATH))
+    db.executescript(_SCHEMA)
+    have = {r[1] for r in db.execute("PRAGMA table_info(runs)")}
+    for col, kind in _ADDED_COLUMNS.items():
+        if col not in have:  # databases from before the column existed
+            db.execute(f"ALTER TABLE runs ADD COLUMN {col} {kind}")
+    return db
+
+
+def record_run(spans: Sequence[Dict], script: str, host: str = "", template: Optional[str] = None,
+               region: Optional[str] = None, wall_ms: float = 0.0, filled: int = 0, total: int = 0,
+               verified: Optional[bool] = None, mismatches: int = 0, memory: Optional[Dict] = None,
+               path: Optional[Path] = None) -> Optional[int]:
+    """One transaction per run; never lets a history problem fail the run itself"""
+    try:
+        db = connect(path)
+        with db:
+            cur = db.execute(
+                "INSERT INTO runs (started, script, host, machine, template, region, wall_ms, filled, total,"
+                " verified, mismatches, handles, js_heap_mb) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                (time.time(), script, host, socket.gethostname(), template, region, wall_ms, filled, total,
+                 None if verified is None else int(verified), mismatches,
+                 (memory or {}).get("handles"), (memory or {}).get("js_heap_mb")),
+            )
+            run_id = cur.lastrowid
+            db.executemany(
+                "INSERT INTO spans (run_id, field, phase, ms, ok, retries) VALUES (?,?,?,?,?,?)",
+                [(run_id, s["field"], s["phase"], s["ms"], int(s["ok"]), s["retries"]) for s in spans],
+            )
+        db.close()
+        return run_id
+    except sqlite3.Error as e:
+        print(f"Run history not saved: {e}")
+        return None
+
+
+# ---------- statistics ----------
+def _median(xs: Sequence[float]) -> float:
+    s = sorted(xs)
+    n = len(s)
+    return (s[(n - 1) // 2] + s[n // 2]) / 2
+
+
+def mann_whitney_p(recent: Sequence[float], base: Sequence[float]) -> float:
+    """One-sided p-value that `recent` tends to be larger than `base` (normal approx., tie-corrected)"""
+    n1, n2 = len(recent), len(base)
+    allv = sorted([(v, 0) for v in recent] + [(v, 1) for v in base])
+    ranks = [0.0] * len(allv)
+    ties = 0.0
+    i = 0
+    while i < len(allv):
+        j = i
+        while j + 1 < len(allv) and allv[j + 1][0] == allv[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        t = j - i + 1
+        ties += t ** 3 - t
+        i = j + 1
+    r1 = sum(r for r, (_, g) in zip(ranks, allv) if g == 0)
+    u = r1 - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    var = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if var <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(var)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def proportion_drop_p(ok1: int, n1: int, ok2: int, n2: int) -> float:
+    """One-sided p-value that success rate 1 (recent) is below rate 2 (baseline)"""
+    if not n1 or not n2:
+        return 1.0
+    p = (ok1 + ok2) / (n1 + n2)
+    se = math.sqrt(p * (1 - p) * (1 / n1 + 1 / n2))
+    if se == 0:
+        return 1.0
+    z = (ok2 / n2 - ok1 / n1) / se
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+# ---------- report ----------
+def _runs(db, script: Optional[str], template: Optional[str], limit: int) -> List[int]:
+    q, args = "SELECT id FROM runs WHERE 1=1", []
+    if script:
+        q += " AND script = ?"
+        args.append(script)
+    if template:
+        q += " AND template = ?"
+        args.append(template)
+    q += " ORDER BY started DESC LIMIT ?"
+    args.append(limit)
+    return [r[0] for r in db.execute(q, args)]
+
+
+def _spans_by_phase(db, run_ids: Sequence[int]) -> Dict[str, Dict[str, List]]:
+    out: Dict[str, Dict[str, List]] = {}
+    if not run_ids:
+        return out
+    marks = ",".join("?" * len(run_ids))
+    for phase, ms, ok in db.execute(f"SELECT phase, ms, ok FROM spans WHERE run_id IN ({marks})", list(run_ids)):
+        p = out.setdefault(phase, {"ms": [], "ok": []})
+        p["ms"].append(ms)
+        p["ok"].append(ok)
+    return out
+
+
+def compare(recent: int = 10, baseline: int = 50, script: Optional[str] = None, template: Optional[str] = None,
+            path: Optional[Path] = None) -> List[Dict]:
+    """Per phase (plus whole runs): recent vs rolling baseline, with regression flags"""
+    db = connect(path)
+    ids = _runs(db, script, template, recent + baseline)
+    new_ids, base_ids = ids[:recent], ids[recent:]
+    rows = []
+    new, base = _spans_by_phase(db, new_ids), _spans_by_phase(db, base_ids)
+
+    marks = ",".join("?" * len(ids)) or "NULL"
+    runs = {rid: (wall, ver) for rid, wall, ver in
+            db.execute(f"SELECT id, wall_ms, verified FROM runs WHERE id IN ({marks})", ids)}
+    new["(run)"] = {"ms": [runs[i][0] for i in new_ids], "ok": [runs[i][1] for i in new_ids if runs[i][1] is not None]}
+    base["(run)"] = {"ms": [runs[i][0] for i in base_ids],
+                     "ok": [runs[i][1] for i in base_ids if runs[i][1] is not None]}
+    db.close()
+
+    for phase in sorted(set(new) & set(base)):
+        a, b = new[phase], base[phase]
+        row = {"phase": phase, "n_recent": len(a["ms"]), "n_base": len(b["ms"]), "slower": False, "failing": False}
+        if a["ms"] and b["ms"]:
+            row["p50_recent"], row["p50_base"] = _median(a["ms"]), _median(b["ms"])
+            if len(a["ms"]) >= MIN_SAMPLES and len(b["ms"]) >= MIN_SAMPLES:
+                row["p_slower"] = mann_whitney_p(a["ms"], b["ms"])
+                row["slower"] = row["p_slower"] < ALPHA and row["p50_recent"] >= MIN_SLOWDOWN * max(row["p50_base"], 0.01)
+        if a["ok"] and b["ok"]:
+            row["ok_recent"], row["ok_base"] = sum(a["ok"]) / len(a["ok"]), sum(b["ok"]) / len(b["ok"])
+            if len(a["ok"]) >= MIN_SAMPLES and len(b["ok"]) >= MIN_SAMPLES:
+                row["p_failing"] = proportion_drop_p(sum(a["ok"]), len(a["ok"]), sum(b["ok"]), len(b["ok"]))
+                row["failing"] = row["p_failing"] < ALPHA
+        rows.append(row)
+    return rows
+
+
+def print_report(rows: List[Dict], recent: int, baseline: int):
+    if not rows:
+        print("Run history: not enough runs to compare yet")
+        return
+    print(f"Last {recent} runs vs the {baseline} before them:")
+    print(f"{'phase':16s} {'p50 now':>9s} {'p50 base':>9s} {'ok now':>7s} {'ok base':>7s}  flag")
+    for r in rows:
+        now = f"{r['p50_recent']:7.1f}ms" if "p50_recent" in r else "-"
+        was = f"{r['p50_base']:7.1f}ms" if "p50_base" in r else "-"
+        okn = f"{r['ok_recent']:6.0%}" if "ok_recent" in r else "-"
+        okb = f"{r['ok_base']:6.0%}" if "ok_base" in r else "-"
+        flag = " ".join(f for f, on in (("⚠️ SLOWER", r["slower"]), ("⚠️ FAILING", r["failing"])) if on)
+        print(f"{r['phase']:16s} {now:>9s} {was:>9s} {okn:>7s} {okb:>7s}  {flag}")
+    bad = [r["phase"] for r in rows if r["slower"] or r["failing"]]
+    print(f"Regressions: {', '.join(bad)}" if bad else "No significant regressions")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offer run history")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("report", help="compare recent runs with a rolling baseline")
+    r.add_argument("--recent", type=int, default=10)
+    r.add_argument("--baseline", type=int, default=50)
+    r.add_argument("--script", help="only runs of this script (mr-offer, offer-entry, ...)")
+    r.add_argument("--template", help="only runs on this template fingerprint / selector key")
+    args = ap.parse_args()
+
+    rows = compare(args.recent, args.baseline, args.script, args.template)
+    print_report(rows, args.recent, args.baseline)
+    sys.exit(1 if any(r["slower"] or r["failing"] for r in rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Append-only run journal per (offer page, workbook): lets a rerun pick up where
+# a crashed or partial run stopped instead of starting over
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+JOURNAL_DIR = Path(__file__).resolve().parent / ".journal"
+MAX_JOURNALS = 200
+JOURNALED_PHASES = {"currency", "type", "fallback", "inject", "retry", "repair"}
+
+
+def journal_key(page_url: str, excel_path: str) -> str:
+    """Same prospect page + same workbook contents -> same journal"""
+    try:
+        st = os.stat(excel_path)
+        sig = f"{os.path.abspath(excel_path)}|{st.st_mtime_ns}|{st.st_size}"
+    except OSError:
+        sig = os.path.abspath(excel_path)
+    return hashlib.sha1(f"{page_url.split('#')[0]}\n{sig}".encode()).hexdigest()[:20]
+
+
+class RunJournal:
+    """One JSONL file per offer; each line is flushed as soon as the step ends"""
+
+    def __init__(self, root: Path = JOURNAL_DIR, max_journals: int = MAX_JOURNALS):
+        self.root = Path(root)
+        self.max_journals = max_journals
+        self.path: Optional[Path] = None
+        self.previous: List[Dict] = []
+
+    def open(self, page_url: str, excel_path: str) -> List[Dict]:
+        """Start (or continue) the journal for this offer; returns earlier runs' entries"""
+        self.root.mkdir(exist_ok=True)
+        self.path = self.root / f"{journal_key(page_url, excel_path)}.jsonl"
+        self.previous = []
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self.previous.append(json.loads(line))
+                    except ValueError:
+                        break  # torn last line from a crash
+        except OSError:
+            self._prune()
+        self.record({"event": "start", "url": page_url, "excel": excel_path})
+        return self.previous
+
+    def record(self, entry: Dict):
+        if not self.path:
+            return
+        entry.setdefault("ts", round(time.time(), 3))
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            print(f"Journal not written: {e}")
+
+    def span(self, s: Dict):
+        """Tracer.on_span hook: keep the steps that change the page"""
+        if s["phase"] in JOURNALED_PHASES:
+            self.record({"event": "step", "field": s["field"], "phase": s["phase"], "ok": s["ok"]})
+
+    def finish(self, ok: bool, **extra):
+        self.record(dict(extra, event="finish", ok=ok))
+
+    @property
+    def resumable(self) -> bool:
+        """An earlier run got at least as far as touching the page"""
+        return any(e.get("event") in ("step", "finish") for e in self.previous)
+
+    @property
+    def completed(self) -> bool:
+        ends = [e for e in self.previous if e.get("event") == "finish"]
+        return bool(ends) and ends[-1]["ok"]
+
+    def ids(self) -> Dict[str, str]:
+        """label -> container id as last recorded"""
+        out: Dict[str, str] = {}
+        for e in self.previous:
+            out.update(e.get("ids") or {})
+        return out
+
+    def _prune(self):
+        files = sorted(self.root.glob("*.jsonl"), key=lambda p: p.stat().st_mtime)
+        for p in files[:max(0, len(files) - self.max_journals + 1)]:
+            try:
+                p.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+# Load the hyphen-named scripts (mr-offer.py etc.) as modules
+
+import importlib.util
+import itertools
+from pathlib import Path
+
+from fill_plans import region_bindings, region_source, region_target
+
+HERE = Path(__file__).resolve().parent
+_COUNTER = itertools.count()
+
+
+def load_script(filename: str = "mr-offer.py"):
+    """Return a fresh module instance of a script.
+
+    Every call executes the file again, so each copy has its own globals
+    (_ID_CACHE, READY, TARGET, ...) - this is how concurrent offers stay isolated.
+    """
+    path = HERE / filename
+    name = f"{path.stem.replace('-', '_')}_{next(_COUNTER)}"
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def set_region(mod, region: str):
+    """Point a loaded script at another regions.json entry (only the globals it has)"""
+    mod.REGION = region
+    mod.BINDINGS = region_bindings(region)
+    for name, value in (("TARGET", region_target), ("SOURCE", region_source)):
+        if hasattr(mod, name):
+            setattr(mod, name, value(region))
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# Persistent label -> container id cache, keyed by offer template
+
+import hashlib
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set
+from urllib.parse import urlsplit
+
+CACHE_PATH = Path(__file__).resolve().parent / ".selector_cache.json"
+MAX_TEMPLATES = 20
+
+# One round trip checks every cached id: still on the page and still holding its label.
+_VALIDATE_JS = """
+(ids) => Object.entries(ids)
+  .filter(([label, id]) => {
+    const el = document.getElementById(id);
+    return el && (el.textContent || '').includes(label);
+  })
+  .map(([label]) => label)
+"""
+
+
+def template_key(page, template: Optional[str] = None) -> str:
+    """Explicit template name if given, else the offer URL with record ids stripped"""
+    if template:
+        return template
+    u = urlsplit(page.url)
+    path = re.sub(r"\d+", "#", u.path)
+    return hashlib.sha1(f"{u.netloc}{path}".encode()).hexdigest()[:16]
+
+
+class SelectorCache:
+    """Disk-backed _ID_CACHE: LRU across templates, self-invalidating per id"""
+
+    def __init__(self, path: Path = CACHE_PATH, max_templates: int = MAX_TEMPLATES):
+        self.path = Path(path)
+        self.max_templates = max_templates
+        self.key: Optional[str] = None
+        self.validated: Set[str] = set()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "loaded": 0, "indexed": 0}
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data.get("templates"), dict) else {"templates": {}}
+        except (OSError, ValueError, AttributeError):
+            return {"templates": {}}
+
+    def _write(self, data: Dict):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, self.path)
+
+    async def warm(self, page, into: Dict[str, str], template: Optional[str] = None) -> int:
+        """Load this template's ids into `into`, keeping only ones the page confirms"""
+        self.key = template_key(page, template)
+        entry = self._read()["templates"].get(self.key)
+        if not entry or not entry.get("ids"):
+            return 0
+
+        ids = entry["ids"]
+        try:
+            good = set(await page.evaluate(_VALIDATE_JS, ids))
+        except Exception:
+            good = set()
+        self.stats["stale"] += len(ids) - len(good)
+        for label in good:
+            into[label] = ids[label]
+        self.validated = good
+        self.stats["loaded"] = len(good)
+        return len(good)
+
+    def hit(self):
+        self.stats["hits"] += 1
+
+    def miss(self):
+        self.stats["misses"] += 1
+
+    def index_hit(self):
+        """Found through the in-page label index - neither a cache hit nor a miss"""
+        self.stats["indexed"] += 1
+
+    def save(self, ids: Dict[str, str]):
+        if not self.key:
+            return
+        data = self._read()
+        templates = data["templates"]
+        # Ids that failed validation were never copied into `ids`, so they drop out here
+        templates[self.key] = {"ids": dict(ids), "used": time.time()}
+        if len(templates) > self.max_templates:
+            for k in sorted(templates, key=lambda k: templates[k].get("used", 0))[: len(templates) - self.max_templates]:
+                del templates[k]
+        try:
+            self._write(data)
+        except OSError as e:
+            print(f"Selector cache not saved: {e}")
+
+    def print_stats(self):
+        s = self.stats
+        print(f"Selector cache: {s['hits']} hits, {s['misses']} misses, "
+              f"{s['loaded']} warm ids, {s['stale']} stale dropped"
+              + (f" ({s['indexed']} blocks found via the label index)" if s["indexed"] else ""))
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Per-field timing spans: cheap enough to leave on, written as JSONL + p50/p95 table
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+TRACE_DIR = Path(__file__).resolve().parent / "traces"
+
+
+def round_trips(page) -> Optional[int]:
+    """Messages sent to the Playwright driver so far (one per awaited API call).
+
+    Read straight off the connection's message counter - no extra protocol
+    traffic. Pages sharing one connection (batch mode) count each other's calls.
+    Returns None if the Playwright internals ever move.
+    """
+    try:
+        return page._impl_obj._connection._last_id
+    except AttributeError:
+        return None
+
+
+class Span:
+    __slots__ = ("tracer", "field", "phase", "started", "rt0", "retries", "ok")
+
+    def __init__(self, tracer: "Tracer", field: str, phase: str):
+        self.tracer = tracer
+        self.field = field
+        self.phase = phase
+        self.retries = 0
+        self.ok = True
+
+    def __enter__(self):
+        self.rt0 = round_trips(self.tracer.page) if self.tracer.page else None
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self.started) * 1000
+        rt1 = round_trips(self.tracer.page) if self.tracer.page else None
+        rec = {
+            "field": self.field,
+            "phase": self.phase,
+            "ms": round(ms, 2),
+            "round_trips": rt1 - self.rt0 if rt1 is not None and self.rt0 is not None else None,
+            "retries": self.retries,
+            "ok": self.ok and exc_type is None,
+        }
+        self.tracer.spans.append(rec)
+        if self.tracer.on_span:
+            self.tracer.on_span(rec)
+        return False
+
+
+class Tracer:
+    """Collects spans in memory; close() writes them as JSONL in one go"""
+
+    def __init__(self, name: str = "run", enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.page = None
+        self.spans: List[Dict] = []
+        self.on_span: Optional[Callable[[Dict], None]] = None  # e.g. RunJournal.span
+
+    def bind(self, page):
+        self.page = page
+        return self
+
+    def span(self, field: str, phase: str) -> Span:
+        return Span(self, field, phase)
+
+    def write(self, path: Optional[Path] = None) -> Optional[Path]:
+        if not self.enabled or not self.spans:
+            return None
+        if path is None:
+            TRACE_DIR.mkdir(exist_ok=True)
+            path = TRACE_DIR / f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl"
+        with open(path, "w", encoding="utf-8") as f:
+            for s in self.spans:
+                f.write(json.dumps(s) + "\n")
+        return path
+
+    def summary(self) -> Dict[str, Dict]:
+        by_phase: Dict[str, List[Dict]] = {}
+        for s in self.spans:
+            by_phase.setdefault(s["phase"], []).append(s)
+        out = {}
+        for phase, spans in by_phase.items():
+            ms = sorted(s["ms"] for s in spans)
+            rts = [s["round_trips"] for s in spans if s["round_trips"] is not None]
+            out[phase] = {
+                "count": len(spans),
+                "p50_ms": ms[(len(ms) - 1) // 2],
+                "p95_ms": ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))],
+                "total_ms": sum(ms),
+                "round_trips": sum(rts) if rts else None,
+                "retries": sum(s["retries"] for s in spans),
+                "failed": sum(1 for s in spans if not s["ok"]),
+            }
+        return out
+
+    def close(self):
+        """Write the JSONL file and print the p50/p95 table"""
+        path = self.write()
+        if not self.spans:
+            return
+        print(f"\n{'phase':16s} {'n':>4s} {'p50':>8s} {'p95':>8s} {'total':>9s} {'rt':>5s} {'retry':>5s} {'fail':>4s}")
+        for phase, s in self.summary().items():
+            rt = "-" if s["round_trips"] is None else str(s["round_trips"])
+            print(f"{phase:16s} {s['count']:4d} {s['p50_ms']:6.1f}ms {s['p95_ms']:6.1f}ms "
+                  f"{s['total_ms']:7.0f}ms {rt:>5s} {s['retries']:5d} {s['failed']:4d}")
+        if path:
+            print(f"Trace: {path}")
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Direct value injection: write every amount in one in-page operation
+
+from typing import Dict, List
+
+# In-page helpers shared by every "whole form in one call" script: find a
+# binding's block (cached id first, then label text like get_by_text), its
+# amount input (right of the currency combobox) and its current currency.
+FORM_HELPERS_JS = """
+  const norm = (s) => (s || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+  const digits = (s) => (s || '').replace(/[^0-9.-]/g, '').replace(/\\.0+$/, '');
+  const visible = (el) => { const r = el.getBoundingClientRect(); return r.width > 0 && r.height > 0; };
+  const blocks = [...document.querySelectorAll('[id^="spl-form-element_"]')];
+
+  const findBlock = (it) => {
+    const byId = it.id && document.getElementById(it.id);
+    if (byId) return byId;
+    const want = norm(it.label);
+    return blocks.find(b => norm(b.textContent).includes(want)) || null;
+  };
+  const findInput = (block) => {
+    const cur = block.querySelector('[role="combobox"], button[aria-expanded], button');
+    const curBox = cur && cur.getBoundingClientRect();
+    const cands = [...block.querySelectorAll('input, [role="textbox"]')].filter(el =>
+      el.type !== 'hidden' && el.getAttribute('role') !== 'combobox' &&
+      !el.closest('[role="listbox"]') && (!cur || !cur.contains(el)) && visible(el));
+    const right = curBox && cands.find(el => {
+      const b = el.getBoundingClientRect();
+      return b.width >= 50 && b.x + b.width / 2 > curBox.x + curBox.width &&
+             Math.abs((b.y + b.height / 2) - (curBox.y + curBox.height / 2)) <= 60;
+    });
+    return right || cands[0] || null;
+  };
+  const currencyOf = (block) => {
+    const cur = block.querySelector('[role="combobox"], button[aria-expanded], button');
+    const m = ((cur && (cur.value || cur.textContent)) || '').match(/\\b[A-Z]{3}\\b/);
+    return m ? m[0] : null;
+  };
+"""
+
+# Where the offer form lives, for MutationObservers: the lowest element holding
+# every block (not the whole body, where chat widgets and banners churn), and
+# which mutations are only a dropdown opening / filtering its option list.
+FORM_ROOT_JS = """
+  const formRoot = () => {
+    const all = [...document.querySelectorAll('[id^="spl-form-element_"]')];
+    let root = all.length ? all[0].parentElement : document.body;
+    while (root && root !== document.body && !all.every((b) => root.contains(b))) root = root.parentElement;
+    return root || document.body;
+  };
+  const LISTBOX = '[role="listbox"]';
+  const isListbox = (n) => n.nodeType === 1 && (n.matches(LISTBOX) || !!n.querySelector(LISTBOX));
+  const inListbox = (m) => m.target.nodeType === 1 && !!m.target.closest(LISTBOX);
+"""
+
+# For each item: find block and input, set the value through the native setter
+# so the framework's value tracker notices, then fire the events the ATS
+# listens for. After two frames the values are read back, so anything the
+# framework reverted on re-render is reported as not verified.
+_INJECT_JS = """
+async (items) => {
+""" + FORM_HELPERS_JS + """
+  const setValue = (el, value) => {
+    el.focus();
+    if (el instanceof HTMLInputElement || el instanceof HTMLTextAreaElement) {
+      const proto = Object.getPrototypeOf(el);
+      const setter = Object.getOwnPropertyDescriptor(proto, 'value').set;
+      setter.call(el, value);
+    } else {
+      el.textContent = value;
+    }
+    el.dispatchEvent(new InputEvent('input', { bubbles: true, inputType: 'insertText', data: value }));
+    el.dispatchEvent(new Event('change', { bubbles: true }));
+    el.blur();  // real blur + focusout, once
+  };
+
+  const done = items.map((it) => {
+    const block = findBlock(it);
+    if (!block) return { label: it.label, ok: false, reason: 'no block' };
+    const input = findInput(block);
+    if (!input) return { label: it.label, id: block.id || null, ok: false, reason: 'no input' };
+    try { setValue(input, it.value); } catch (e) {
+      return { label: it.label, id: block.id || null, ok: false, reason: String(e) };
+    }
+    return { label: it.label, id: block.id || null, input, want: it.value };
+  });
+
+  // Let the framework re-render before trusting anything (background tabs get
+  // no animation frames, hence the timeout)
+  await Promise.race([
+    new Promise(r => requestAnimationFrame(() => requestAnimationFrame(r))),
+    new Promise(r => setTimeout(r, 100)),
+  ]);
+
+  return done.map(({ input, want, ...r }) => {
+    if (!input) return r;
+    const got = 'value' in input ? input.value : input.textContent;
+    const ok = input.isConnected && digits(got) === want;
+    return { ...r, ok, value: got, reason: ok ? null : (input.isConnected ? 'value reverted' : 'input replaced') };
+  });
+}
+"""
+
+
+async def inject_values(page, items: List[Dict]) -> Dict[str, Dict]:
+    """items: [{"label", "id", "value"}] -> {label: {"ok", "id", "value", "reason"}}"""
+    if not items:
+        return {}
+    results = await page.evaluate(_INJECT_JS, items)
+    return {r["label"]: r for r in results}
+
+
+async def inject_all(page, bindings: List[Dict], excel_values: Dict[str, str], ids: Dict[str, str],
+                     trace) -> Dict[str, Dict]:
+    """FILL_MODE "inject": set every value in one page call; unverified ones fall back to typing.
+
+    Block ids the page call found are added to `ids` (the script's _ID_CACHE).
+    """
+    items = [
+        {"label": b["label_text"], "id": ids.get(b["label_text"]) or b.get("container_id"),
+         "value": excel_values.get(b["excel_cell"], "")}
+        for b in bindings if excel_values.get(b["excel_cell"])
+    ]
+    try:
+        with trace.span("*", "inject"):
+            injected = await inject_values(page, items)
+    except Exception as e:
+        print(f"Inject mode failed, typing everything: {e}")
+        return {}
+    for label, r in injected.items():
+        if r.get("id"):
+            ids[label] = r["id"]
+    ok = sum(1 for r in injected.values() if r["ok"])
+    print(f"Injected {ok}/{len(items)} values in one call")
+    return injected
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Post-run verification: read every bound field back in one call and diff it
+
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from value_injection import FORM_HELPERS_JS
+
+REPORT_DIR = Path(__file__).resolve().parent / "reports"
+
+_SNAPSHOT_JS = """
+(items) => {
+""" + FORM_HELPERS_JS + """
+  return items.map((it) => {
+    const block = findBlock(it);
+    if (!block) return { label: it.label, found: false };
+    const input = findInput(block);
+    return {
+      label: it.label,
+      found: true,
+      id: block.id || null,
+      amount: input ? ('value' in input ? input.value : input.textContent) : null,
+      currency: currencyOf(block),
+    };
+  });
+}
+"""
+
+
+def _digits(s: Optional[str]) -> str:
+    s = re.sub(r"[^0-9.\-]", "", s or "")
+    return re.sub(r"\.0+$", "", s)
+
+
+async def snapshot(page, bindings: List[Dict], ids: Dict[str, str]) -> Dict[str, Dict]:
+    """Amount + currency of every bound field, in one round trip"""
+    items = [{"label": b["label_text"], "id": ids.get(b["label_text"]) or b.get("container_id")} for b in bindings]
+    rows = await page.evaluate(_SNAPSHOT_JS, items)
+    return {r["label"]: r for r in rows}
+
+
+def diff(snap: Dict[str, Dict], bindings: List[Dict], expected: Dict[str, str],
+         target: Optional[str] = None) -> List[Dict]:
+    """Fields whose page state differs from the (already _fmt_num-normalised) Excel values"""
+    out = []
+    for b in bindings:
+        label, cell = b["label_text"], b["excel_cell"]
+        want = expected.get(cell, "")
+        got = snap.get(label) or {"found": False}
+        if not got["found"]:
+            if want or target:
+                out.append({"label": label, "cell": cell, "field": "block", "expected": "present", "actual": None})
+            continue
+        if want:
+            same = _digits(got["amount"]) == want if re.fullmatch(r"-?[0-9.]+", want) else \
+                (got["amount"] or "").strip() == want
+            if not same:
+                out.append({"label": label, "cell": cell, "field": "amount", "expected": want, "actual": got["amount"]})
+        # Blocks without a currency combobox report None and aren't a mismatch
+        if target and got["currency"] and got["currency"] != target:
+            out.append({"label": label, "cell": cell, "field": "currency", "expected": target, "actual": got["currency"]})
+    return out
+
+
+def write_report(report: Dict, name: str = "verify") -> Path:
+    REPORT_DIR.mkdir(exist_ok=True)
+    path = REPORT_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# Workbook reader: one streaming pass over only the needed rows + parsed-value cache
+
+import csv
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from formula_eval import cell_name, evaluate_cells, is_formula
+
+CACHE_PATH = Path(__file__).resolve().parent / ".workbook_cache.json"
+MAX_ENTRIES = 200
+READER_VERSION = 2  # bump when parsing / formula results change: older cache entries are re-read
+
+_ADDR = re.compile(r"^([A-Z]+)(\d+)$")
+_MEMO: Dict[str, Dict] = {}  # in-process copy of the disk cache (batch / daemon)
+
+
+def _split(addr: str) -> Tuple[int, int]:
+    m = _ADDR.match(addr.strip().upper())
+    if not m:
+        raise ValueError(f"Bad cell address: {addr}")
+    col = 0
+    for ch in m.group(1):
+        col = col * 26 + ord(ch) - 64
+    return int(m.group(2)), col
+
+
+def _plain(v):
+    """Keep cache entries JSON-safe (dates etc. become text)"""
+    if v is None or isinstance(v, (int, float, str, bool)):
+        return v
+    return str(v)
+
+
+def _sheet_from_rows(rows: Iterable[List]) -> Dict[str, object]:
+    return {cell_name(r, c): v for r, row in enumerate(rows, start=1)
+            for c, v in enumerate(row, start=1) if v is not None and v != ""}
+
+
+def _fill_formulas(out: Dict[str, object], load_sheet: Callable[[], Dict[str, object]]) -> Dict[str, object]:
+    """Cells that came back empty or as formula text are computed from the sheet's formulas.
+
+    data_only=True only sees the values Excel cached on its last save - workbooks
+    from the HR exporter or other tools have none.
+    """
+    todo = [a for a, v in out.items() if v is None or is_formula(v)]
+    if not todo:
+        return out
+    sheet = load_sheet()
+    todo = [a for a in todo if is_formula(sheet.get(a))]
+    if todo:
+        for a, v in evaluate_cells(sheet, todo).items():
+            out[a] = _plain(v)
+    return out
+
+
+def _sheet_xlsx(path: str) -> Dict[str, object]:
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, data_only=False, read_only=True)
+    try:
+        sh = wb[wb.sheetnames[0]]
+        # Array formulas come back as objects carrying the formula in .text
+        return _sheet_from_rows([getattr(v, "text", v) for v in row] for row in sh.iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+def _index_xlsx(path: str, cells: Iterable[str]) -> Dict[str, object]:
+    import openpyxl  # only paid for when a workbook really needs parsing
+
+    wanted = {_split(a): a.strip().upper() for a in cells}
+    rows = {r for r, _ in wanted}
+    cols = [c for _, c in wanted]
+    out = {a: None for a in wanted.values()}
+
+    wb = openpyxl.load_workbook(path, data_only=True, read_only=True)
+    try:
+        sh = wb[wb.sheetnames[0]]
+        # Stream once from the first to the last needed row, only over needed columns
+        lo_c = min(cols)
+        for r, row in enumerate(
+            sh.iter_rows(min_row=min(rows), max_row=max(rows), min_col=lo_c, max_col=max(cols), values_only=True),
+            start=min(rows),
+        ):
+            if r not in rows:
+                continue
+            for c, v in enumerate(row, start=lo_c):
+                addr = wanted.get((r, c))
+                if addr:
+                    out[addr] = _plain(v)
+    finally:
+        wb.close()
+    return _fill_formulas(out, lambda: _sheet_xlsx(path))
+
+
+def _index_csv(path: str, cells: Iterable[str]) -> Dict[str, object]:
+    """CSV export of the sheet: row N / column L of the file is cell LN"""
+    wanted = {_split(a): a.strip().upper() for a in cells}
+    last = max(r for r, _ in wanted)
+    out = {a: None for a in wanted.values()}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for r, row in enumerate(csv.reader(f), start=1):
+            if r > last:
+                break
+            for c, v in enumerate(row, start=1):
+                addr = wanted.get((r, c))
+                if addr:
+                    out[addr] = v
+
+    def whole_file():
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return _sheet_from_rows(csv.reader(f))
+    return _fill_formulas(out, whole_file)
+
+
+def _index_json(path: str, cells: Iterable[str]) -> Dict[str, object]:
+    """JSON export: either {"E21": 123, ...} or a list of rows like the CSV"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    out = {}
+    for a in cells:
+        addr = a.strip().upper()
+        if isinstance(data, dict):
+            out[addr] = _plain(data.get(addr))
+        else:
+            r, c = _split(addr)
+            row = data[r - 1] if r - 1 < len(data) else []
+            out[addr] = _plain(row[c - 1]) if c - 1 < len(row) else None
+    if isinstance(data, dict):
+        return _fill_formulas(out, lambda: {k.strip().upper(): v for k, v in data.items()})
+    return _fill_formulas(out, lambda: _sheet_from_rows(data))
+
+
+_READERS = {".csv": _index_csv, ".json": _index_json}
+
+
+def _stamp(path: str) -> Dict:
+    st = os.stat(path)
+    return {"mtime": st.st_mtime_ns, "size": st.st_size, "version": READER_VERSION}
+
+
+def _load_disk() -> Dict:
+    try:
+        with open(CACHE_PATH, encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_disk(key: str, entry: Dict):
+    data = _load_disk()
+    data.pop(key, None)
+    data[key] = entry  # re-insert so dict order doubles as LRU order
+    while len(data) > MAX_ENTRIES:
+        data.pop(next(iter(data)))
+    try:
+        tmp = CACHE_PATH.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, CACHE_PATH)
+    except OSError:
+        pass
+
+
+def read_values(path: str, cells: Iterable[str]) -> Dict[str, object]:
+    """Raw values for `cells` from an .xlsx/.csv/.json offer file, cached by path+mtime+size+reader version"""
+    cells = {a.strip().upper() for a in cells}
+    key = os.path.abspath(path)
+    stamp = _stamp(path)
+
+    entry = _MEMO.get(key) or _load_disk().get(key)
+    if entry and all(entry.get(k) == v for k, v in stamp.items()):
+        if cells <= entry["cells"].keys():
+            _MEMO[key] = entry
+            return {a: entry["cells"][a] for a in cells}
+        cells |= entry["cells"].keys()  # widen the re-parse so the entry only grows
+
+    reader = _READERS.get(Path(path).suffix.lower(), _index_xlsx)
+    values = reader(path, cells)
+    entry = dict(stamp, cells=values)
+    _MEMO[key] = entry
+    _save_disk(key, entry)
+    return values